@@ -0,0 +1,242 @@
+"""
+Allocation instrumentation for the game loop, built on tracemalloc and gc
+callbacks.
+
+The loop marks its phases by calling AllocationTracker.phase() with the name
+of the phase it is entering and phase(None) at the end of each frame. Every
+phase is charged with the net memory blocks it leaves allocated, the bytes it
+briefly needed at its peak and any garbage collections that ran inside it.
+
+Net counts hide churn: objects created and freed within the frame cancel
+out. Every so often a frame is sampled in two ways. Tracemalloc snapshots at
+its start and end find the call sites of the objects that survive it. A line
+tracer over the game's own code records, for every line run, how far the
+traced memory peaked above its level when the line started. This charges
+each site with the temporaries it creates, even those freed straight away.
+Line tracing slows the sampled frames down severalfold.
+"""
+import fnmatch
+import gc
+import os
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+
+class AllocationTracker:
+	"""
+	Attributes allocations and garbage collection pauses to loop phases and
+	call sites, printing a report every 'interval' frames.
+	"""
+
+	def __init__(self, interval=600, top=10, sample_interval=60, trace_frames=1):
+		"""
+		Initializes the tracker. A report covering the last 'interval' frames
+		is printed with the 'top' allocating call sites. Every
+		'sample_interval'th frame is snapshotted for call site attribution;
+		'trace_frames' is the traceback depth kept by tracemalloc.
+		"""
+		self.interval = max(1, int(interval))
+		self.top = int(top)
+		self.sample_interval = max(1, int(sample_interval))
+		self.trace_frames = max(1, int(trace_frames))
+		self.filters = [
+			tracemalloc.Filter(False, tracemalloc.__file__),
+			tracemalloc.Filter(False, __file__),
+			tracemalloc.Filter(False, fnmatch.__file__),
+			tracemalloc.Filter(False, os.path.join(os.path.dirname(re.__file__), '*')),
+			tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+			tracemalloc.Filter(False, '<unknown>')
+		]
+		self.root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+		self.current = None
+		self.gc_start = 0.0
+		self.line_site = None
+		self.line_size = 0
+		self.phase_peak = 0
+		# Bound once, since binding allocates
+		self.line_tracer = self._trace_line
+		self._clear()
+	# End: def AllocationTracker.__init__
+
+	def start(self):
+		"""
+		Starts tracing allocations and timing garbage collections.
+		"""
+		tracemalloc.start(self.trace_frames)
+		gc.callbacks.append(self._on_gc)
+	# End: def AllocationTracker.start
+
+	def stop(self):
+		"""
+		Stops tracing and prints a report of the frames since the last one.
+		"""
+		if self.current is not None:
+			self.phase(None)
+		if self.frames:
+			self.report()
+		if self._on_gc in gc.callbacks:
+			gc.callbacks.remove(self._on_gc)
+		sys.settrace(None)
+		tracemalloc.stop()
+	# End: def AllocationTracker.stop
+
+	def phase(self, name):
+		"""
+		Ends the current phase and enters the named phase, starting a frame if
+		none is in progress. A name of None ends the frame.
+		"""
+		blocks = sys.getallocatedblocks()
+		size, peak = tracemalloc.get_traced_memory()
+		# The line tracer of sampled frames resets the peak as it goes
+		peak = max(peak, self.phase_peak)
+
+		if self.current is not None:
+			stats = self.phases.setdefault(self.current, [0, 0, 0, 0.0, 0])
+			stats[0] += blocks - self.start_blocks
+			stats[1] += size - self.start_size
+			stats[2] = max(stats[2], peak - self.start_size)
+			del stats
+
+		if name is None:
+			self._end_frame()
+		elif self.current is None:
+			self._begin_frame()
+		self.current = name
+
+		# Measure from here so the bookkeeping above is not charged
+		del blocks, size, peak
+		tracemalloc.reset_peak()
+		self.phase_peak = 0
+		self.start_size = tracemalloc.get_traced_memory()[0]
+		self.start_blocks = sys.getallocatedblocks()
+	# End: def AllocationTracker.phase
+
+	def report(self):
+		"""
+		Prints allocations per frame by phase, garbage collection pauses and
+		the top allocating call sites, then starts a new reporting window.
+		"""
+		frames = max(1, self.frames)
+		blocks = sum(stats[0] for stats in self.phases.values())
+		size = sum(stats[1] for stats in self.phases.values())
+		print(f'Allocations over {self.frames} frames: {blocks / frames:.1f} net blocks/frame, {size / frames / 1024:.2f} KiB/frame retained')
+		for name, stats in self.phases.items():
+			print(f'  {name}: {stats[0] / frames:.1f} net blocks/frame, {stats[1] / frames / 1024:.2f} KiB/frame retained, '
+				f'{stats[2] / 1024:.2f} KiB peak, {stats[4]} collections ({stats[3] * 1000:.2f} ms)')
+
+		pauses = sorted(pause for _, pause in self.collections)
+		if pauses:
+			generations = Counter(generation for generation, _ in self.collections)
+			by_generation = ', '.join(f'gen{gen} {generations[gen]}' for gen in sorted(generations))
+			p99 = pauses[min(len(pauses) - 1, int(len(pauses) * 0.99))]
+			print(f'GC: {len(pauses)} collections ({by_generation}), pauses total {sum(pauses) * 1000:.2f} ms, '
+				f'p99 {p99 * 1000:.3f} ms, max {pauses[-1] * 1000:.3f} ms')
+		else:
+			print('GC: no collections')
+
+		if self.allocators:
+			print(f'Top retaining allocators, blocks surviving the frame ({self.samples} sampled frames):')
+			for site, count in self.allocators.most_common(self.top):
+				print(f'  {site}: {count} blocks, {self.allocator_sizes[site] / 1024:.2f} KiB')
+
+		if self.transient:
+			samples = max(1, self.samples)
+			print(f'Top transient allocators, bytes briefly allocated per frame ({self.samples} sampled frames):')
+			for (filename, lineno), size in self.transient.most_common(self.top):
+				print(f'  {os.path.basename(filename)}:{lineno}: {size / samples / 1024:.2f} KiB')
+
+		self._clear()
+	# End: def AllocationTracker.report
+
+	def _clear(self):
+		self.frames = 0
+		self.samples = 0
+		self.phases = {}
+		self.collections = []
+		self.allocators = Counter()
+		self.allocator_sizes = Counter()
+		self.transient = Counter()
+		self.snapshot = None
+		self.start_blocks = 0
+		self.start_size = 0
+	# End: def AllocationTracker._clear
+
+	def _begin_frame(self):
+		if (self.frames + 1) % self.sample_interval == 0:
+			self.snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+			self.line_site = None
+			sys.settrace(self._trace_call)
+	# End: def AllocationTracker._begin_frame
+
+	def _end_frame(self):
+		self.frames += 1
+		if self.snapshot is not None:
+			sys.settrace(None)
+			snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+			for stat in snapshot.compare_to(self.snapshot, 'lineno'):
+				if stat.count_diff > 0:
+					frame = stat.traceback[0]
+					site = f'{os.path.basename(frame.filename)}:{frame.lineno}'
+					self.allocators[site] += stat.count_diff
+					self.allocator_sizes[site] += stat.size_diff
+			self.snapshot = None
+			self.samples += 1
+
+		if self.frames >= self.interval:
+			self.report()
+	# End: def AllocationTracker._end_frame
+
+	def _trace_call(self, frame, event, arg):
+		"""
+		Global trace function of sampled frames: traces the lines of the
+		game's own code only. Library calls are charged to the game line that
+		made them.
+		"""
+		filename = frame.f_code.co_filename
+		if filename.startswith(self.root) and filename != __file__:
+			return self.line_tracer
+		return None
+	# End: def AllocationTracker._trace_call
+
+	def _trace_line(self, frame, event, arg):
+		"""
+		Local trace function of sampled frames: charges the line that just
+		finished with the bytes the traced memory peaked above its start.
+		"""
+		size, peak = tracemalloc.get_traced_memory()
+		if peak > self.phase_peak:
+			self.phase_peak = peak
+		if self.line_site is not None and peak > self.line_size:
+			self.transient[self.line_site] += peak - self.line_size
+
+		if event == 'line':
+			self.line_site = (frame.f_code.co_filename, frame.f_lineno)
+		elif event == 'return':
+			# The rest of the calling line is charged to the caller
+			caller = frame.f_back
+			self.line_site = None
+			if caller is not None and caller.f_code.co_filename.startswith(self.root):
+				self.line_site = (caller.f_code.co_filename, caller.f_lineno)
+
+		# Measure from here so the bookkeeping above is not charged. The size
+		# is read before resetting the peak, as reading it allocates.
+		del size, peak
+		self.line_size = tracemalloc.get_traced_memory()[0]
+		tracemalloc.reset_peak()
+		return self.line_tracer
+	# End: def AllocationTracker._trace_line
+
+	def _on_gc(self, gc_phase, info):
+		if gc_phase == 'start':
+			self.gc_start = time.perf_counter()
+		else:
+			pause = time.perf_counter() - self.gc_start
+			self.collections.append((info['generation'], pause))
+			stats = self.phases.setdefault(self.current or 'idle', [0, 0, 0, 0.0, 0])
+			stats[3] += pause
+			stats[4] += 1
+	# End: def AllocationTracker._on_gc
+# End: class AllocationTracker
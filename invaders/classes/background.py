@@ -0,0 +1,146 @@
+"""
+Scrolling parallax background: a starfield of layers moving down the screen
+at different speeds, pre-rendered once so that scrolling is only blits.
+"""
+import random
+
+import pygame
+
+from classes.game_object import load_image
+from classes.render_queue import LAYER_BACKGROUND
+
+# Star colors, dimmer for the farther layers
+STAR_COLORS = ((150, 150, 190), (200, 200, 230), (255, 255, 255))
+TRANSPARENT = (0, 0, 0)
+
+
+class ParallaxBackground:
+	"""
+	Draws the background image and a number of star layers, each scrolling
+	down at its own speed in pixels per frame. 'speeds' lists the speed of the
+	image first and then of each star layer, nearest last; the number of
+	speeds sets the number of layers.
+
+	Every layer is rendered at startup into a tile that wraps around
+	vertically. The image's tile is the image followed by its mirror image,
+	so the wrap has no seam. Each frame a layer is drawn as the window of its
+	tile at the layer's offset, which takes at most two blits: one for the
+	part of the window before the wrap and one for the part after. Layers are
+	composed into the 'backdrop' surface, which is submitted to the render
+	queue as a single image and is also what the game repairs sprite areas
+	from between full redraws.
+	"""
+
+	def __init__(self, screen, image, speeds=(0.0,), stars=120, seed=0):
+		"""
+		Pre-renders the layer tiles for the size and pixel format of the given
+		screen surface. 'stars' is the number of stars per star layer.
+		"""
+		self.width, self.height = screen.get_size()
+		width, height = self.width, self.height
+		rng = random.Random(seed)
+
+		self.layers = []
+		image = load_image(image, width, height)
+		tile = pygame.Surface((width, height * 2), 0, screen)
+		tile.blit(image, (0, 0))
+		tile.blit(pygame.transform.flip(image, False, True), (0, height))
+		self.layers.append(_Layer(tile, speeds[0]))
+
+		for depth, speed in enumerate(speeds[1:]):
+			tile = pygame.Surface((width, height), 0, screen)
+			tile.fill(TRANSPARENT)
+			color = STAR_COLORS[min(depth, len(STAR_COLORS) - 1)]
+			size = 1 + depth
+			for _ in range(stars):
+				x = rng.randrange(width)
+				y = rng.randrange(height)
+				# Stars across the tile's edge are drawn on both sides of it
+				for wrap in (-height, 0, height):
+					tile.fill(color, (x, y + wrap, size, size))
+			tile.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+			self.layers.append(_Layer(tile, speed))
+
+		self.backdrop = pygame.Surface((width, height), 0, screen)
+		self.changed = True
+	# End: def ParallaxBackground.__init__
+
+	def set_speeds(self, speeds):
+		"""
+		Changes the scrolling speeds of the existing layers, in the same
+		order as given to the constructor.
+		"""
+		for layer, speed in zip(self.layers, speeds):
+			layer.speed = speed
+	# End: def ParallaxBackground.set_speeds
+
+	def reset(self):
+		"""
+		Scrolls every layer back to its starting position.
+		"""
+		for layer in self.layers:
+			layer.offset = 0.0
+		self.changed = True
+	# End: def ParallaxBackground.reset
+
+	def scroll(self):
+		"""
+		Advances every layer one frame. Called every frame, whether or not
+		the background is drawn, so the scrolling keeps its pace when
+		redraws are skipped.
+		"""
+		for layer in self.layers:
+			if layer.speed:
+				layer.offset = (layer.offset + layer.speed) % layer.period
+				self.changed = True
+	# End: def ParallaxBackground.scroll
+
+	def draw(self, queue):
+		"""
+		Composes the layers into the backdrop if any has moved since it was
+		last composed, and submits the backdrop to the given render queue.
+		Returns True if the backdrop changed.
+		"""
+		changed = self.changed
+		if changed:
+			backdrop = self.backdrop
+			for layer in self.layers:
+				layer.draw(backdrop, self.height)
+			self.changed = False
+		queue.submit(LAYER_BACKGROUND, self.backdrop, 0, 0, self.width, self.height)
+
+		return changed
+	# End: def ParallaxBackground.draw
+# End: class ParallaxBackground
+
+
+class _Layer:
+	"""
+	One background layer: its wrap-around tile, speed and current offset.
+	"""
+
+	def __init__(self, tile, speed):
+		self.tile = tile
+		self.speed = speed
+		self.offset = 0.0
+		self.period = tile.get_height()
+		self.top = pygame.Rect(0, 0, tile.get_width(), 0)
+		self.bottom = pygame.Rect(0, 0, tile.get_width(), 0)
+	# End: def _Layer.__init__
+
+	def draw(self, surface, height):
+		"""
+		Blits the window of the tile at the current offset to the surface.
+		"""
+		period = self.period
+		start = (period - int(self.offset)) % period
+		top = self.top
+		top.y = start
+		top.height = min(height, period - start)
+		surface.blit(self.tile, (0, 0), top)
+		if top.height < height:
+			bottom = self.bottom
+			bottom.height = height - top.height
+			surface.blit(self.tile, (0, top.height), bottom)
+	# End: def _Layer.draw
+# End: class _Layer
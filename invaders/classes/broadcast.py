@@ -0,0 +1,392 @@
+"""
+Spectator broadcast: streams the game's objects to any number of local
+viewers over TCP or a Unix socket.
+
+The stream opens with a header giving the screen size. Each message after it
+is prefixed with its length and is either a snapshot of every object or the
+delta of one frame: the objects spawned, moved or changed, and died since the
+frame before. Objects are records of an id, a kind and position quantized to
+16 bit whole pixels, so a frame of a standard fleet takes a few hundred bytes.
+
+The game thread only diffs the objects and packs the records. Fanning them
+out happens on an asyncio event loop in its own thread, which batches every
+message queued since it last ran into one write per client. A client whose
+unsent data backs up past the buffer limit has frames dropped rather than
+slowing the game, and is resynchronized with a fresh snapshot once it has
+caught up.
+"""
+import asyncio
+import collections
+import os
+import struct
+import threading
+
+# Stream header: magic, protocol version, screen width and height
+MAGIC = b'KIBC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHH')
+
+# Message length prefix, and the message heads: type, frame number, score and
+# record counts
+LENGTH = struct.Struct('<I')
+SNAPSHOT = 1
+DELTA = 2
+SNAPSHOT_HEAD = struct.Struct('<BIIH')
+DELTA_HEAD = struct.Struct('<BIIHHH')
+
+# Object records: id, kind and x, y position; died records: id only
+OBJECT = struct.Struct('<IBhh')
+DIED = struct.Struct('<I')
+
+# Object kinds, with a flag bit set while the object is dying
+KINDS = ('player', 'bullet', 'beigeEnemy', 'greenEnemy', 'pinkEnemy', 'yellowEnemy', 'blueEnemy')
+KIND_DYING = 0x80
+ENEMY_KINDS = {'beige': 2, 'green': 3, 'pink': 4, 'yellow': 5, 'blue': 6}
+
+
+class Broadcaster:
+	"""
+	Serves the broadcast stream at 'address', either 'host:port' or
+	'unix:path'. 'max_buffer' is the number of unsent bytes a client may have
+	queued before its frames are dropped.
+	"""
+
+	def __init__(self, address, width, height, max_buffer=65536):
+		"""
+		Initializes the broadcaster without opening the socket.
+		"""
+		self.address = address
+		self.header = HEADER.pack(MAGIC, VERSION, width, height)
+		self.max_buffer = max_buffer
+		self.frame = 0
+		self.ids = {}
+		self.next_id = 1
+		self.state = {}
+
+		# Shared with the event loop thread: the game thread appends messages
+		# and the loop drains them; the loop counts clients and snapshot
+		# requests and the game thread reads them.
+		self.pending = collections.deque()
+		self.scheduled = False
+		self.clients = 0
+		self.snapshot_requests = 0
+		self.snapshots_served = 0
+
+		self.connections = []
+		self.served = 0
+		self.sent = 0
+		self.dropped = 0
+		self.loop = None
+		self.server = None
+		self.thread = None
+		self.started = threading.Event()
+	# End: def Broadcaster.__init__
+
+	def start(self):
+		"""
+		Starts the event loop thread and waits for the socket to open. Returns
+		False if it couldn't be opened.
+		"""
+		self.loop = asyncio.new_event_loop()
+		self.thread = threading.Thread(target=self._run, name='Broadcaster', daemon=True)
+		self.thread.start()
+		self.started.wait()
+		if self.server is None:
+			self.thread.join()
+			self.thread = None
+			return False
+
+		print(f'Broadcasting on {self.address}')
+		return True
+	# End: def Broadcaster.start
+
+	def publish(self, game_objects, score):
+		"""
+		Queues the delta of the current frame's objects, and a snapshot if a
+		client is waiting for one. Does nothing but count the frame while no
+		client is connected.
+		"""
+		self.frame += 1
+		if not self.clients:
+			self.state = {}
+			self.ids = {}
+			return
+
+		ids = {}
+		current = {}
+		spawned = []
+		moved = []
+		known = self.ids
+		previous_state = self.state.get
+		pack = OBJECT.pack
+		for kind, game_object in _objects(game_objects):
+			ident = known.get(game_object)
+			if ident is None:
+				ident = self.next_id
+				self.next_id = ident % 0xffffffff + 1
+			ids[game_object] = ident
+			if game_object.is_dying:
+				kind |= KIND_DYING
+			record = (kind, _quantize(game_object.x_pos), _quantize(game_object.y_pos))
+			current[ident] = record
+			previous = previous_state(ident)
+			if previous is None:
+				spawned.append(pack(ident, *record))
+			elif previous != record:
+				moved.append(pack(ident, *record))
+		state = self.state
+		died = [DIED.pack(ident) for ident in state if ident not in current]
+		self.ids = ids
+		self.state = current
+
+		delta = b''.join([DELTA_HEAD.pack(DELTA, self.frame, score, len(spawned), len(moved), len(died))] + spawned + moved + died)
+		delta = LENGTH.pack(len(delta)) + delta
+
+		snapshot = None
+		requests = self.snapshot_requests
+		if requests != self.snapshots_served:
+			self.snapshots_served = requests
+			records = [OBJECT.pack(ident, *record) for ident, record in current.items()]
+			snapshot = b''.join([SNAPSHOT_HEAD.pack(SNAPSHOT, self.frame, score, len(records))] + records)
+			snapshot = LENGTH.pack(len(snapshot)) + snapshot
+
+		self.pending.append((delta, snapshot))
+		if not self.scheduled:
+			self.scheduled = True
+			self.loop.call_soon_threadsafe(self._flush)
+	# End: def Broadcaster.publish
+
+	def stop(self):
+		"""
+		Disconnects every client, closes the socket, stops the event loop
+		thread and prints the broadcast totals.
+		"""
+		if self.thread is None:
+			return
+
+		asyncio.run_coroutine_threadsafe(self._close(), self.loop).result()
+		self.loop.call_soon_threadsafe(self.loop.stop)
+		self.thread.join()
+		self.thread = None
+		print(f'Broadcast {self.frame} frames to {self.served} clients: {self.sent} bytes sent, {self.dropped} frames dropped')
+	# End: def Broadcaster.stop
+
+	def _run(self):
+		"""
+		Event loop thread main: opens the socket and serves clients until
+		stopped.
+		"""
+		asyncio.set_event_loop(self.loop)
+		try:
+			self.server = self.loop.run_until_complete(self._listen())
+		except OSError as error:
+			print(f'Broadcast disabled: {error}')
+		finally:
+			self.started.set()
+
+		if self.server is not None:
+			self.loop.run_forever()
+		self.loop.close()
+	# End: def Broadcaster._run
+
+	async def _listen(self):
+		if self.address.startswith('unix:'):
+			path = self.address[len('unix:'):]
+			if os.path.exists(path):
+				os.remove(path)
+			return await asyncio.start_unix_server(self._serve, path)
+
+		host, port = self.address.rsplit(':', 1)
+		return await asyncio.start_server(self._serve, host, int(port))
+	# End: def Broadcaster._listen
+
+	async def _serve(self, reader, writer):
+		"""
+		Serves one client: sends the header, asks the game for a snapshot and
+		keeps the client registered until it disconnects.
+		"""
+		connection = _Connection(writer, asyncio.current_task())
+		writer.write(self.header)
+		self.connections.append(connection)
+		self.clients = len(self.connections)
+		self.snapshot_requests += 1
+		self.served += 1
+		try:
+			# Viewers send nothing; this returns when the client disconnects
+			await reader.read()
+		except ConnectionError:
+			pass
+		finally:
+			self.connections.remove(connection)
+			self.clients = len(self.connections)
+			writer.close()
+	# End: def Broadcaster._serve
+
+	def _flush(self):
+		"""
+		Writes every message queued since the last flush to each client, in
+		one write per client. Clients in sync with the stream share one
+		joined copy of the deltas.
+		"""
+		self.scheduled = False
+		batch = []
+		while self.pending:
+			batch.append(self.pending.popleft())
+		deltas = None
+
+		for connection in self.connections:
+			transport = connection.writer.transport
+			if transport.is_closing():
+				continue
+
+			if transport.get_write_buffer_size() > self.max_buffer:
+				# Too slow to keep up: drop the frames, and start over from a
+				# snapshot once the client has drained its backlog
+				self.dropped += len(batch)
+				connection.synced = False
+				connection.waiting = False
+				continue
+
+			if connection.synced:
+				if deltas is None:
+					deltas = b''.join([delta for delta, snapshot in batch])
+				data = deltas
+			else:
+				chunks = []
+				for delta, snapshot in batch:
+					if connection.synced:
+						chunks.append(delta)
+					elif snapshot is not None:
+						chunks.append(snapshot)
+						connection.synced = True
+						connection.waiting = False
+				if not connection.synced and not connection.waiting:
+					connection.waiting = True
+					self.snapshot_requests += 1
+				data = b''.join(chunks)
+
+			if data:
+				transport.write(data)
+				self.sent += len(data)
+	# End: def Broadcaster._flush
+
+	async def _close(self):
+		self.server.close()
+		tasks = [connection.task for connection in self.connections]
+		for connection in self.connections:
+			# Closing would wait to send a slow client's backlog first
+			connection.writer.transport.abort()
+		# Each client's serve task ends once its connection is lost
+		await asyncio.gather(*tasks, return_exceptions=True)
+		await self.server.wait_closed()
+	# End: def Broadcaster._close
+# End: class Broadcaster
+
+
+class SpectatorState:
+	"""
+	Reconstructs the broadcast game objects on the viewer side. Data read
+	from the stream is passed to feed() in chunks of any size.
+	"""
+
+	def __init__(self):
+		self.buffer = bytearray()
+		self.width = None
+		self.height = None
+		self.frame = 0
+		self.score = 0
+		self.objects = {}
+		self.synced = False
+	# End: def SpectatorState.__init__
+
+	def feed(self, data):
+		"""
+		Applies every complete message in the stream data received so far.
+		Returns the number of messages applied.
+		"""
+		buffer = self.buffer
+		buffer += data
+		offset = 0
+		if self.width is None:
+			if len(buffer) < HEADER.size:
+				return 0
+			magic, version, self.width, self.height = HEADER.unpack_from(buffer)
+			if magic != MAGIC or version != VERSION:
+				raise ValueError(f'Not a version {VERSION} broadcast stream')
+			offset = HEADER.size
+
+		applied = 0
+		while len(buffer) - offset >= LENGTH.size:
+			length, = LENGTH.unpack_from(buffer, offset)
+			start = offset + LENGTH.size
+			if len(buffer) - start < length:
+				break
+			self._apply(buffer, start)
+			offset = start + length
+			applied += 1
+		del buffer[:offset]
+
+		return applied
+	# End: def SpectatorState.feed
+
+	def _apply(self, buffer, offset):
+		objects = self.objects
+		message_type = buffer[offset]
+		if message_type == SNAPSHOT:
+			_, self.frame, self.score, count = SNAPSHOT_HEAD.unpack_from(buffer, offset)
+			offset += SNAPSHOT_HEAD.size
+			objects.clear()
+			for _ in range(count):
+				ident, kind, x, y = OBJECT.unpack_from(buffer, offset)
+				objects[ident] = (kind, x, y)
+				offset += OBJECT.size
+			self.synced = True
+		elif message_type == DELTA:
+			_, frame, self.score, spawned, moved, died = DELTA_HEAD.unpack_from(buffer, offset)
+			offset += DELTA_HEAD.size
+			self.frame = frame
+			for _ in range(spawned + moved):
+				ident, kind, x, y = OBJECT.unpack_from(buffer, offset)
+				objects[ident] = (kind, x, y)
+				offset += OBJECT.size
+			for _ in range(died):
+				ident, = DIED.unpack_from(buffer, offset)
+				objects.pop(ident, None)
+				offset += DIED.size
+		else:
+			raise ValueError(f'Unknown broadcast message type: {message_type}')
+	# End: def SpectatorState._apply
+# End: class SpectatorState
+
+
+class _Connection:
+	__slots__ = ('writer', 'task', 'synced', 'waiting')
+
+	def __init__(self, writer, task):
+		self.writer = writer
+		self.task = task
+		self.synced = False
+		self.waiting = True
+	# End: def _Connection.__init__
+# End: class _Connection
+
+
+def _objects(game_objects):
+	"""
+	Yields the kind and object of every broadcast game object.
+	"""
+	player = game_objects['player']
+	if player is not None:
+		yield 0, player
+	for bullet in game_objects['bullets']:
+		yield 1, bullet
+	for color, enemies in game_objects['enemies'].items():
+		kind = ENEMY_KINDS[color]
+		for enemy in enemies:
+			yield kind, enemy
+# End: def _objects
+
+
+def _quantize(position):
+	return max(-32768, min(32767, int(position)))
+# End: def _quantize
@@ -0,0 +1,198 @@
+"""
+Gameplay capture: frames are copied straight from the main screen's pixel
+buffer into a shared memory ring buffer, and a background process encodes
+them to disk so that recording never stalls the game loop.
+"""
+import os
+import multiprocessing as mp
+
+import numpy as np
+import pygame
+
+# Output formats
+FORMAT_RAW = 'raw'
+FORMAT_IMAGES = 'images'
+
+# Indices of the shared ring buffer counters
+WRITTEN = 0
+ENCODED = 1
+
+
+class FrameRecorder:
+	"""
+	Records frames of a screen surface to a raw video file or an image
+	sequence.
+
+	The ring buffer holds a fixed number of frames, so memory use is bounded.
+	The game is the only writer and the encoder process the only reader; each
+	side advances its own counter. If the encoder falls behind and the ring is
+	full then the frame is dropped and counted rather than waited for. If the
+	encoder has died, e.g. because the output couldn't be created, recording
+	is turned off.
+	"""
+
+	def __init__(self, surface, output, format=FORMAT_RAW, buffer_frames=32, interval=1):
+		"""
+		Initializes the recorder for frames the size of the given surface.
+
+		With FORMAT_RAW, 'output' is a file that receives packed rgb24 frames
+		(e.g. for 'ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH'). With
+		FORMAT_IMAGES, 'output' is a directory that receives one PNG per frame.
+		Only every 'interval'th frame passed to capture() is recorded.
+		"""
+		if format not in (FORMAT_RAW, FORMAT_IMAGES):
+			raise ValueError(f'Unknown capture format: {format}')
+
+		self.width, self.height = surface.get_size()
+		self.output = output
+		self.format = format
+		self.slots = max(2, int(buffer_frames))
+		self.interval = max(1, int(interval))
+		self.frames = 0
+		self.dropped = 0
+		self.failed = False
+		self.encoder = None
+
+		# 32 bit surfaces are copied as packed pixels and unpacked by the
+		# encoder, anything else goes through an rgb array view.
+		self.packed = surface.get_bytesize() == 4
+		if self.packed:
+			shape = (self.height, self.width)
+			dtype = np.uint32
+		else:
+			shape = (self.height, self.width, 3)
+			dtype = np.uint8
+		self.shape = shape
+		self.dtype = dtype
+		self.shifts = surface.get_shifts()[:3]
+
+		ctx = mp.get_context('spawn')
+		size = self.slots * int(np.prod(shape)) * np.dtype(dtype).itemsize
+		self.ring_buffer = ctx.RawArray('B', size)
+		self.counter_buffer = ctx.RawArray('q', 2)
+		self.ring = np.frombuffer(self.ring_buffer, dtype=dtype).reshape((self.slots,) + shape)
+		self.counters = self.counter_buffer
+		self.ready = ctx.Semaphore(0)
+		self.done = ctx.Event()
+		self.ctx = ctx
+	# End: def FrameRecorder.__init__
+
+	def start(self):
+		"""
+		Starts the background encoder process.
+		"""
+		args = (self.ring_buffer, self.counter_buffer, self.slots, self.shape, self.dtype,
+			self.shifts, self.output, self.format, self.ready, self.done)
+		self.encoder = self.ctx.Process(target=_encode, args=args, daemon=True)
+		self.encoder.start()
+	# End: def FrameRecorder.start
+
+	def capture(self, surface):
+		"""
+		Copies the surface's current pixels into the next free ring buffer
+		slot. Returns False if the frame was skipped or dropped.
+		"""
+		if self.failed:
+			return False
+		self.frames += 1
+		if self.frames % self.interval:
+			return False
+
+		counters = self.counters
+		written = counters[WRITTEN]
+		if written - counters[ENCODED] >= self.slots:
+			# Only a full ring can mean the encoder is gone, so it is only
+			# checked for then
+			if not self.encoder.is_alive():
+				self.failed = True
+				print(f'Recording stopped: encoder exited with code {self.encoder.exitcode}')
+				return False
+			self.dropped += 1
+			return False
+
+		slot = self.ring[written % self.slots]
+		if self.packed:
+			# The '2' view maps the pixel buffer in place; transposed it is
+			# row major, so the copy is a straight memory copy.
+			view = surface.get_view('2')
+			np.copyto(slot, np.asarray(view).T)
+		else:
+			view = pygame.surfarray.pixels3d(surface)
+			np.copyto(slot, view.swapaxes(0, 1))
+		del view
+
+		counters[WRITTEN] = written + 1
+		self.ready.release()
+
+		return True
+	# End: def FrameRecorder.capture
+
+	def stop(self):
+		"""
+		Waits for the encoder to write the frames still in the ring buffer,
+		stops it and prints the recording totals.
+		"""
+		if self.encoder is None:
+			return
+
+		self.done.set()
+		self.ready.release()
+		self.encoder.join()
+		exitcode = self.encoder.exitcode
+		self.encoder = None
+
+		recorded = self.counters[ENCODED]
+		if exitcode:
+			print(f'Recording to {self.output} failed: encoder exited with code {exitcode} after {recorded} frames')
+			return
+		print(f'Recorded {recorded} frames ({self.width}x{self.height}) to {self.output}, dropped {self.dropped}')
+	# End: def FrameRecorder.stop
+# End: class FrameRecorder
+
+
+def _encode(ring_buffer, counter_buffer, slots, shape, dtype, shifts, output, format, ready, done):
+	"""
+	Encoder process main loop: writes frames from the ring buffer in order
+	until told to stop and the ring is empty.
+	"""
+	ring = np.frombuffer(ring_buffer, dtype=dtype).reshape((slots,) + shape)
+	counters = counter_buffer
+	height, width = shape[:2]
+	rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+	if format == FORMAT_RAW:
+		directory = os.path.dirname(output)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		out = open(output, 'wb')
+	else:
+		os.makedirs(output, exist_ok=True)
+		out = None
+
+	try:
+		while True:
+			encoded = counters[ENCODED]
+			if encoded >= counters[WRITTEN]:
+				if done.is_set():
+					break
+				ready.acquire(timeout=0.1)
+				continue
+
+			frame = ring[encoded % slots]
+			if frame.ndim == 2:
+				for channel, shift in enumerate(shifts):
+					np.right_shift(frame, shift, out=rgb[:, :, channel], casting='unsafe')
+			else:
+				rgb[:] = frame
+
+			if out:
+				out.write(memoryview(rgb))
+			else:
+				image = pygame.surfarray.make_surface(rgb.swapaxes(0, 1))
+				pygame.image.save(image, os.path.join(output, f'frame{encoded:06d}.png'))
+
+			counters[ENCODED] = encoded + 1
+	finally:
+		if out:
+			out.close()
+# End: def _encode
@@ -3,7 +3,7 @@ Package of objects representing non-player and player controllable characters
 in the game.
 """
 
-from random import randint
+import random
 from classes.movable_object import MovableObject, PLANE_X, PLANE_Y, PLANE_Z
 
 
@@ -28,12 +28,19 @@ class EnemyCharacter(MovableObject):
 			* 'iheight' - the image height in pixels
 			* 'speed'   - the character's movement rate in pixels
 			* 'points'  - the enemy's point score value
+
+		An optional random.Random instance bound to 'rng' is used for the
+		kamikaze rolls instead of the module level generator.
 		"""
 		super().__init__(data)
 		self.points = data['points']
 		self.kamikaze_chance = data['kamikaze_chance']
 		self.fleet_y_pos = self.starting_y_pos
 		self.on_kamikaze_run = False
+		self.rng = random
+
+		if 'rng' in data:
+			self.rng = data['rng']
 
 		if 'speedy' in data:
 			self.FLEET_Y_RATE = self.MOVE_Y_RATE
@@ -73,7 +80,7 @@ class EnemyCharacter(MovableObject):
 	# End: def EnemyCharacter.is_kamikaze
 
 	def roll_kamikaze_chance(self):
-		kc = randint(0, 100)
+		kc = self.rng.randint(0, 100)
 		self.on_kamikaze_run = kc > (100 - self.kamikaze_chance)
 		if self.on_kamikaze_run:
 			print(f'Kamikaze roll = {kc}, chance = {self.kamikaze_chance}')
@@ -81,13 +88,13 @@ class EnemyCharacter(MovableObject):
 		return self.on_kamikaze_run
 	# End def EnemyCharacter.roll_kamikaze_chance
 
-	def update(self, movement_plane, surface, player, roll_kamikaze=False):
+	def update(self, movement_plane, queue, player, roll_kamikaze=False):
 		"""
 		Updates the objects position on screen along the specified movement
 		plane. See MovableObject.update.
 
 		"""
-		super().update(movement_plane, surface)
+		super().update(movement_plane, queue)
 		was_kamikaze = False
 		killed_player = False
 		if not self.is_movable():
@@ -107,9 +114,9 @@ class EnemyCharacter(MovableObject):
 
 		if killed_player == True:
 			self.die(True)
-			self.draw(surface)
+			self.draw(queue)
 			player.die(True)
-			player.draw(surface)
+			player.draw(queue)
 			
 		return was_kamikaze
 	# End: def EnemyCharacter.update
@@ -1,5 +1,8 @@
 import pygame
 
+# Scaled images keyed by (path, width, height), shared by all game objects
+_image_cache = {}
+
 class GameObject:
 	"""
 	Represents an on screen object in the game with collision detection.
@@ -17,12 +20,18 @@ class GameObject:
 			* 'ypos'    - the image's y-coordinate on screen
 			* 'iwidth'  - the image width in pixels
 			* 'iheight' - the image height in pixels
+
+		An optional render queue layer may be bound to the key 'layer',
+		otherwise the object is drawn on the background layer.
 		"""
 		self.image1 = data['image']
 		self.starting_x_pos = data['xpos']
 		self.starting_y_pos = data['ypos']
 		self.width = data['iwidth']
 		self.height = data['iheight']
+		self.layer = 0
+		if 'layer' in data:
+			self.layer = data['layer']
 		self.reset()
 	# End: def GameObject.__init__
 
@@ -69,11 +78,12 @@ class GameObject:
 		return self.height
 	# End: def GameObject.get_height
 	
-	def draw(self, surface):
+	def draw(self, queue):
 		"""
-		Displays the object on the given screen surface.
+		Submits the object to the given render queue for display on its
+		layer.
 		"""
-		surface.blit(self.image, [self.x_pos, self.y_pos])
+		queue.submit(self.layer, self.image, self.x_pos, self.y_pos, self.width, self.height)
 	# End: def GameObject.draw
 
 	def reset(self):
@@ -81,8 +91,23 @@ class GameObject:
 		Resets the object's location on screen to it's original x and y pixel
 		positions.
 		"""
-		self.image = pygame.transform.scale(pygame.image.load(self.image1), (self.width, self.height))
+		self.image = load_image(self.image1, self.width, self.height)
 		self.x_pos = self.starting_x_pos
 		self.y_pos = self.starting_y_pos
 	# End: def GameObject.reset
 # End: class GameObject
+
+
+def load_image(path, width, height):
+	"""
+	Returns the image file at the given file system path scaled to the given
+	pixel width and height. Images are decoded and scaled once and then
+	served from a cache, so game objects sharing a sprite share one surface.
+	"""
+	key = (path, width, height)
+	image = _image_cache.get(key)
+	if image is None:
+		image = pygame.transform.scale(pygame.image.load(path), (width, height))
+		_image_cache[key] = image
+	return image
+# End: def load_image
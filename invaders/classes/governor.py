@@ -0,0 +1,99 @@
+"""
+Adaptive quality governor that sheds optional rendering work when frames run
+over budget and restores it when the load drops.
+"""
+
+# Quality levels from best to cheapest. Each step sheds a little more work,
+# in order: particle density, then how often the whole background is
+# redrawn (frames), then how often the HUD is re-rendered (frames), and
+# finally presenting only the dirty rects instead of the full screen.
+QUALITY_LEVELS = (
+	{'particles': 1.0, 'background': 1, 'hud': 1, 'dirty_rects': False},
+	{'particles': 0.5, 'background': 1, 'hud': 1, 'dirty_rects': False},
+	{'particles': 0.25, 'background': 1, 'hud': 1, 'dirty_rects': False},
+	{'particles': 0.1, 'background': 1, 'hud': 1, 'dirty_rects': False},
+	{'particles': 0.1, 'background': 2, 'hud': 1, 'dirty_rects': False},
+	{'particles': 0.1, 'background': 4, 'hud': 1, 'dirty_rects': False},
+	{'particles': 0.1, 'background': 4, 'hud': 15, 'dirty_rects': False},
+	{'particles': 0.1, 'background': 4, 'hud': 60, 'dirty_rects': False},
+	{'particles': 0.1, 'background': 4, 'hud': 60, 'dirty_rects': True}
+)
+
+
+class QualityGovernor:
+	"""
+	Tracks an exponential moving average of the frame work time against the
+	frame budget. When the average stays over the budget for 'degrade_frames'
+	frames the quality drops a level; when it stays under 'restore_ratio' of
+	the budget for 'restore_frames' frames it rises a level. The gap between
+	the two thresholds and the longer restore wait keep the quality from
+	oscillating. Every change is logged with the load that caused it.
+	"""
+
+	def __init__(self, framerate, smoothing=0.1, degrade_frames=15, restore_frames=120, restore_ratio=0.7):
+		"""
+		Initializes the governor at full quality for the given target frame
+		rate.
+		"""
+		self.budget = 1.0 / framerate
+		self.smoothing = smoothing
+		self.degrade_frames = degrade_frames
+		self.restore_frames = restore_frames
+		self.restore_ratio = restore_ratio
+		self.level = 0
+		self.average = 0.0
+		self.over = 0
+		self.under = 0
+	# End: def QualityGovernor.__init__
+
+	def settings(self):
+		"""
+		Returns the settings map of the current quality level.
+		"""
+		return QUALITY_LEVELS[self.level]
+	# End: def QualityGovernor.settings
+
+	def set_framerate(self, framerate):
+		"""
+		Changes the target frame rate the budget is derived from.
+		"""
+		self.budget = 1.0 / framerate
+	# End: def QualityGovernor.set_framerate
+
+	def update(self, frame_time):
+		"""
+		Adds the work time in seconds of the frame just presented. Returns
+		True if the quality level changed.
+		"""
+		self.average += self.smoothing * (frame_time - self.average)
+
+		if self.average > self.budget:
+			self.over += 1
+			self.under = 0
+		elif self.average < self.budget * self.restore_ratio:
+			self.under += 1
+			self.over = 0
+		else:
+			self.over = 0
+			self.under = 0
+
+		if self.over >= self.degrade_frames and self.level < len(QUALITY_LEVELS) - 1:
+			self._change(self.level + 1)
+			return True
+		if self.under >= self.restore_frames and self.level > 0:
+			self._change(self.level - 1)
+			return True
+		return False
+	# End: def QualityGovernor.update
+
+	def _change(self, level):
+		old_level = self.level
+		self.level = level
+		self.over = 0
+		self.under = 0
+		direction = 'down' if level > old_level else 'up'
+		settings = ', '.join(f'{key} {value}' for key, value in QUALITY_LEVELS[level].items())
+		print(f'Quality {direction} {old_level} -> {level}: average frame {self.average * 1000:.2f} ms '
+			f'of {self.budget * 1000:.2f} ms budget ({settings})')
+	# End: def QualityGovernor._change
+# End: class QualityGovernor
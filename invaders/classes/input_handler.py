@@ -0,0 +1,165 @@
+"""
+Input handling for the game loop: a restricted event queue, optional late
+latching of the movement keys and input-to-present latency measurement.
+"""
+import time
+
+import pygame
+
+# The only events the game reacts to; everything else is kept off the queue
+GAME_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP]
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)
+MOVEMENT_KEYS = (pygame.K_LEFT, pygame.K_RIGHT)
+
+# Latency histogram bucket width and count; the last bucket collects the rest
+BUCKET_MS = 1
+BUCKETS = 200
+
+
+class InputHandler:
+	"""
+	Collects the game's input events once per frame.
+
+	With 'late_latch' on, the movement keys are sampled again from the
+	keyboard state immediately before the player is moved, so a key pressed
+	while the fleet was being simulated still takes effect in that frame.
+
+	With 'measure' on, every key event is timestamped when it is taken off
+	the queue and its latency to the present of the frame that first acted
+	on it is added to a histogram. The queue is drained every 'poll_ms' while
+	the frame waits, so timestamps are within about that of the event's
+	arrival.
+	"""
+
+	def __init__(self, late_latch=False, measure=False, poll_ms=1.0):
+		"""
+		Initializes the handler and restricts the event queue to the events
+		the game uses.
+		"""
+		self.late_latch = late_latch
+		self.measure = measure
+		self.poll = poll_ms / 1000.0
+		self.pending = []
+		self.handled = []
+		self.histogram = [0] * BUCKETS
+		self.deadline = 0.0
+
+		pygame.event.set_blocked(None)
+		pygame.event.set_allowed(GAME_EVENTS)
+	# End: def InputHandler.__init__
+
+	def events(self):
+		"""
+		Returns the events received since the last call, oldest first.
+		"""
+		self._drain()
+		pending = self.pending
+		self.pending = []
+		events = []
+		for event, stamp, applied in pending:
+			if self.measure and not applied and event.type in KEY_EVENTS:
+				self.handled.append(stamp)
+			events.append(event)
+
+		return events
+	# End: def InputHandler.events
+
+	def latch(self, player):
+		"""
+		In late latch mode, sets the player's horizontal direction from the
+		current state of the movement keys. Events received meanwhile stay
+		queued for the next call to events().
+		"""
+		if not self.late_latch:
+			return
+
+		self._drain()
+		keys = pygame.key.get_pressed()
+		player.set_x_direction(keys[pygame.K_RIGHT] - keys[pygame.K_LEFT])
+
+		if self.measure:
+			for i, (event, stamp, applied) in enumerate(self.pending):
+				if not applied and event.type in KEY_EVENTS and event.key in MOVEMENT_KEYS:
+					self.handled.append(stamp)
+					self.pending[i] = (event, stamp, True)
+	# End: def InputHandler.latch
+
+	def presented(self):
+		"""
+		Records the latency of the events acted on in the frame that was just
+		presented.
+		"""
+		if not self.handled:
+			return
+
+		now = time.perf_counter()
+		histogram = self.histogram
+		for stamp in self.handled:
+			bucket = int((now - stamp) * 1000) // BUCKET_MS
+			histogram[min(bucket, BUCKETS - 1)] += 1
+		self.handled.clear()
+	# End: def InputHandler.presented
+
+	def wait(self, clock, framerate):
+		"""
+		Waits out the rest of the frame at the given frame rate. When
+		measuring, the wait is spent draining the event queue in short
+		slices so that events are timestamped close to their arrival.
+		"""
+		if not self.measure:
+			clock.tick(framerate)
+			return
+
+		now = time.perf_counter()
+		period = 1.0 / framerate if framerate else 0.0
+		self.deadline = max(self.deadline + period, now)
+		while now < self.deadline:
+			self._drain()
+			time.sleep(min(self.poll, self.deadline - now))
+			now = time.perf_counter()
+		clock.tick()
+	# End: def InputHandler.wait
+
+	def percentile(self, fraction):
+		"""
+		Returns the given fraction (0 to 1) percentile of the recorded
+		latencies in milliseconds, or None if none were recorded.
+		"""
+		total = sum(self.histogram)
+		if total == 0:
+			return None
+
+		target = fraction * total
+		count = 0
+		for bucket, hits in enumerate(self.histogram):
+			count += hits
+			if count >= target:
+				return (bucket + 1) * BUCKET_MS
+		return BUCKETS * BUCKET_MS
+	# End: def InputHandler.percentile
+
+	def report(self):
+		"""
+		Prints the latency histogram's event count and percentiles.
+		"""
+		total = sum(self.histogram)
+		if total == 0:
+			print('Input latency: no key events recorded')
+			return
+
+		print(f'Input latency over {total} key events: p50 <= {self.percentile(0.5)} ms, '
+			f'p95 <= {self.percentile(0.95)} ms, p99 <= {self.percentile(0.99)} ms, '
+			f'max <= {self.percentile(1.0)} ms')
+		for bucket, hits in enumerate(self.histogram):
+			if hits:
+				print(f'  {bucket * BUCKET_MS:3d}-{(bucket + 1) * BUCKET_MS:3d} ms: {hits}')
+	# End: def InputHandler.report
+
+	def _drain(self):
+		events = pygame.event.get()
+		if events:
+			now = time.perf_counter()
+			for event in events:
+				self.pending.append((event, now, False))
+	# End: def InputHandler._drain
+# End: class InputHandler
@@ -1,7 +1,6 @@
-import pygame
 import util.config as cfg
 
-from classes.game_object import GameObject
+from classes.game_object import GameObject, load_image
 
 PLANE_X = 'x'
 PLANE_Y = 'y'
@@ -48,6 +47,9 @@ class MovableObject(GameObject):
 		
 		if 'image2' in data:
 			self.image2 = data['image2']
+			if self.image2:
+				# Decode the secondary image now rather than on the hot path
+				load_image(self.image2, self.width, self.height)
 		if 'min_xpos' in data:
 			self.min_xpos = data['min_xpos']
 		if 'max_xpos' in data:
@@ -73,10 +75,20 @@ class MovableObject(GameObject):
 		its secondary image.
 		"""
 		if swap_image == True and self.image2:
-			self.image = pygame.transform.scale(pygame.image.load(self.image2), (self.width, self.height))
+			self.image = load_image(self.image2, self.width, self.height)
 		self.is_dying = True
 	# End: def MovableObject.die
 
+	def reset(self):
+		"""
+		Resets the object's location on screen to it's original x and y pixel
+		positions and clears its stopped and dying states.
+		"""
+		super().reset()
+		self.is_stopped = False
+		self.is_dying = False
+	# End: def MovableObject.reset
+
 	def set_movable(self, movable):
 		"""
 		Updates the object's movable state to the given True or False state. If
@@ -92,6 +104,14 @@ class MovableObject(GameObject):
 		return not self.is_stopped
 	# End: def MovableObject.is_active
 
+	def is_visible(self):
+		"""
+		Returns True if any part of the object is within the screen.
+		"""
+		return (self.x_pos < self.scr_width and self.y_pos < self.scr_height
+			and self.x_pos + self.width > 0 and self.y_pos + self.height > 0)
+	# End: def MovableObject.is_visible
+
 	def has_died(self):
 		return self.is_dying
 	# End: def MovableObject.has_died
@@ -174,7 +194,7 @@ class MovableObject(GameObject):
 			self.is_stopped = True
 	# End: def MovableObject.move_x
 
-	def update(self, movement_plane, surface):
+	def update(self, movement_plane, queue):
 		"""
 		Updates the objects position on screen along the specified movement
 		plane. The specified movement_plane must be one of:
@@ -184,7 +204,8 @@ class MovableObject(GameObject):
 
 		The object must have its bidirectional indicator(s) and movement limits
 		defined at time of instantiation. If any of these are not defined then
-		no action is taken.
+		no action is taken. Otherwise the object is drawn to the given render
+		queue.
 		"""
 		actionable = False
 		if movement_plane in (PLANE_X, PLANE_Z):
@@ -195,7 +216,7 @@ class MovableObject(GameObject):
 			if self.bidirectional_y != None and self.min_ypos != None and self.max_ypos != None:
 				self.move_y()
 				actionable = True
-		if actionable:
-			self.draw(surface)
+		if actionable and self.is_visible():
+			self.draw(queue)
 	# End: def MovableObject.update
 # End: class MovableObject
@@ -0,0 +1,233 @@
+"""
+Particle effects for explosions, engine trails and bullet sparks.
+
+All particle state lives in fixed size NumPy arrays, live particles packed at
+the front, so a frame's update is a handful of vectorized operations and its
+draw is a single blend through a pixel array view of the target surface.
+"""
+import math
+import time
+
+import numpy as np
+import pygame
+
+
+class ParticleSystem:
+	"""
+	A fixed capacity pool of particles.
+
+	The pool never grows past 'max_particles': emissions beyond the free
+	capacity are trimmed. Above that, the system degrades gracefully: when an
+	update and draw together run over 'budget_ms' then the emission scale is
+	cut, so fewer particles are spawned until the cost is back under budget,
+	after which the scale slowly recovers. A 'budget_ms' of None turns this
+	off, for callers that need the same emissions however long frames take.
+	'density' is an external scale on top of that, for callers that shed
+	effect quality under load.
+	"""
+
+	def __init__(self, max_particles=20000, budget_ms=2.0, drag=0.96, gravity=0.05, size=2, seed=None):
+		"""
+		Initializes an empty particle pool. 'drag' is the fraction of velocity
+		kept each frame, 'gravity' the downward acceleration in pixels per
+		frame, and 'size' the side in pixels of each drawn particle.
+		"""
+		self.max_particles = int(max_particles)
+		self.budget = None if budget_ms is None else budget_ms / 1000.0
+		self.drag = drag
+		self.gravity = gravity
+		self.size = max(1, int(size))
+		self.density = 1.0
+		self.scale = 1.0
+		self.count = 0
+		self.drawn_rect = None
+		self.rng = np.random.default_rng(seed)
+
+		self.pos = np.zeros((self.max_particles, 2), dtype=np.float32)
+		self.vel = np.zeros((self.max_particles, 2), dtype=np.float32)
+		self.life = np.zeros(self.max_particles, dtype=np.float32)
+		self.max_life = np.ones(self.max_particles, dtype=np.float32)
+		self.color = np.zeros((self.max_particles, 3), dtype=np.float32)
+	# End: def ParticleSystem.__init__
+
+	def emit(self, x, y, count, speed, life, color, direction=0.0, spread=2 * math.pi, jitter=0.0):
+		"""
+		Spawns up to 'count' particles at x, y moving at up to 'speed' pixels
+		per frame for 'life' frames. Particles head in 'direction' radians
+		(0 is to the right, pi/2 is down) within a cone of 'spread' radians;
+		'jitter' scatters their starting positions by that many pixels.
+		Returns the number of particles actually spawned.
+		"""
+		count = min(int(count * self.scale * self.density), self.max_particles - self.count)
+		if count <= 0:
+			return 0
+
+		start = self.count
+		end = start + count
+		rng = self.rng
+		angles = direction + (rng.random(count, dtype=np.float32) - 0.5) * spread
+		speeds = rng.random(count, dtype=np.float32) * speed
+		self.vel[start:end, 0] = np.cos(angles) * speeds
+		self.vel[start:end, 1] = np.sin(angles) * speeds
+		self.pos[start:end, 0] = x
+		self.pos[start:end, 1] = y
+		if jitter:
+			self.pos[start:end] += (rng.random((count, 2), dtype=np.float32) - 0.5) * (2 * jitter)
+		lives = life * (0.5 + rng.random(count, dtype=np.float32) * 0.5)
+		self.life[start:end] = lives
+		self.max_life[start:end] = lives
+		self.color[start:end] = color
+		self.count = end
+
+		return count
+	# End: def ParticleSystem.emit
+
+	def explode(self, x, y, color, count=400, speed=4.0, life=40):
+		"""
+		Spawns a burst of particles in every direction from x, y.
+		"""
+		return self.emit(x, y, count, speed, life, color, jitter=4.0)
+	# End: def ParticleSystem.explode
+
+	def sparks(self, x, y, color=(255, 240, 160), count=40, speed=3.0, life=12):
+		"""
+		Spawns a short lived shower of sparks thrown upward from x, y.
+		"""
+		return self.emit(x, y, count, speed, life, color, direction=-math.pi / 2, spread=math.pi)
+	# End: def ParticleSystem.sparks
+
+	def trail(self, x, y, color=(255, 160, 60), count=6, speed=2.0, life=10):
+		"""
+		Spawns a few engine exhaust particles streaming downward from x, y.
+		"""
+		return self.emit(x, y, count, speed, life, color, direction=math.pi / 2, spread=0.6, jitter=3.0)
+	# End: def ParticleSystem.trail
+
+	def seed(self, seed):
+		"""
+		Reseeds the random generator that scatters emitted particles.
+		"""
+		self.rng = np.random.default_rng(seed)
+	# End: def ParticleSystem.seed
+
+	def clear(self):
+		"""
+		Removes every particle.
+		"""
+		self.count = 0
+	# End: def ParticleSystem.clear
+
+	def update_and_draw(self, surface):
+		"""
+		Advances every particle one frame, drops the expired ones and draws
+		the rest to the given surface, then adjusts the emission scale to the
+		time it took if there is a budget.
+		"""
+		if self.budget is None:
+			self.update()
+			self.draw(surface)
+			return
+
+		started = time.perf_counter()
+		self.update()
+		self.draw(surface)
+		elapsed = time.perf_counter() - started
+
+		if elapsed > self.budget:
+			self.scale = max(0.05, self.scale * min(0.9, self.budget / elapsed))
+		elif self.scale < 1.0:
+			self.scale = min(1.0, self.scale + 0.02)
+	# End: def ParticleSystem.update_and_draw
+
+	def update(self):
+		"""
+		Advances every particle one frame and packs the survivors to the
+		front of the arrays.
+		"""
+		n = self.count
+		if n == 0:
+			return
+
+		vel = self.vel[:n]
+		vel *= self.drag
+		vel[:, 1] += self.gravity
+		self.pos[:n] += vel
+		life = self.life[:n]
+		life -= 1.0
+
+		alive = life > 0.0
+		live = int(np.count_nonzero(alive))
+		if live < n:
+			for array in (self.pos, self.vel, self.life, self.max_life, self.color):
+				array[:live] = array[:n][alive]
+		self.count = live
+	# End: def ParticleSystem.update
+
+	def draw(self, surface):
+		"""
+		Adds every on screen particle straight into the surface's pixels,
+		faded by its remaining life. The area drawn over is kept in
+		'drawn_rect', None if nothing was drawn.
+		"""
+		self.drawn_rect = None
+		n = self.count
+		if n == 0:
+			return
+
+		width, height = surface.get_size()
+		size = self.size
+		xs = self.pos[:n, 0].astype(np.intp)
+		ys = self.pos[:n, 1].astype(np.intp)
+		visible = (xs >= 0) & (ys >= 0) & (xs < width - size + 1) & (ys < height - size + 1)
+		if not visible.any():
+			return
+		xs = xs[visible]
+		ys = ys[visible]
+		left = int(xs.min())
+		top = int(ys.min())
+		self.drawn_rect = pygame.Rect(left, top, int(xs.max()) - left + size, int(ys.max()) - top + size)
+
+		fade = (self.life[:n] / self.max_life[:n])[visible, np.newaxis]
+		rgb = (self.color[:n][visible] * fade).astype(np.uint16)
+
+		# Blend additively so fading particles glow into the background
+		# rather than darkening it.
+		if surface.get_bytesize() == 4:
+			self._blend_packed(surface, xs, ys, rgb)
+			return
+
+		pixels = pygame.surfarray.pixels3d(surface)
+		for dx in range(size):
+			for dy in range(size):
+				px = xs + dx
+				py = ys + dy
+				blended = pixels[px, py] + rgb
+				np.minimum(blended, 255, out=blended)
+				pixels[px, py] = blended
+		del pixels
+	# End: def ParticleSystem.draw
+
+	def _blend_packed(self, surface, xs, ys, rgb):
+		"""
+		Additively blends particles into a 32 bit surface through its flat
+		pixel buffer: every covered pixel is gathered, unpacked, blended,
+		repacked and scattered back in one pass per step.
+		"""
+		size = self.size
+		stride = surface.get_pitch() // 4
+		offsets = np.array([dx + dy * stride for dy in range(size) for dx in range(size)], dtype=np.intp)
+		index = ((xs + ys * stride)[np.newaxis, :] + offsets[:, np.newaxis]).ravel()
+		rgb = np.tile(rgb, (size * size, 1))
+
+		buffer = surface.get_buffer()
+		pixels = np.frombuffer(buffer, dtype=np.uint32)
+		values = pixels[index]
+		packed = values & np.uint32(surface.get_masks()[3])
+		for channel, shift in enumerate(surface.get_shifts()[:3]):
+			blended = ((values >> np.uint32(shift)) & np.uint32(0xff)).astype(np.uint16) + rgb[:, channel]
+			np.minimum(blended, 255, out=blended)
+			packed |= blended.astype(np.uint32) << np.uint32(shift)
+		pixels[index] = packed
+		del pixels, buffer
+	# End: def ParticleSystem._blend_packed
+# End: class ParticleSystem
@@ -0,0 +1,80 @@
+"""
+Render queue collecting a frame's draw commands so they can be culled,
+ordered and blitted in a single batch.
+"""
+
+# Draw layers, drawn in increasing order
+LAYER_BACKGROUND = 0
+LAYER_ENEMIES = 10
+LAYER_BULLETS = 20
+LAYER_PLAYER = 30
+LAYER_UI = 40
+
+
+class RenderQueue:
+	"""
+	Game objects submit (layer, image, position) commands during the frame
+	instead of blitting directly. flush() sorts the commands by layer and,
+	within a layer, groups them by source image in the order each image was
+	first submitted, then draws them all with one Surface.blits call. This
+	gives a deterministic z-order regardless of update order.
+	"""
+
+	def __init__(self, surface, track_dirty=False):
+		"""
+		Initializes an empty queue drawing to the given surface. If
+		'track_dirty' is True then the screen areas drawn above the
+		background layer by the last flush are kept in 'dirty_rects'.
+		"""
+		self.surface = surface
+		self.width, self.height = surface.get_size()
+		self.track_dirty = track_dirty
+		self.commands = []
+		self.groups = {}
+		self.dirty_rects = []
+	# End: def RenderQueue.__init__
+
+	def submit(self, layer, image, x, y, width, height):
+		"""
+		Queues the image to be drawn at x, y on the given layer. Images lying
+		entirely outside the surface are culled rather than queued.
+		"""
+		if x >= self.width or y >= self.height or x + width <= 0 or y + height <= 0:
+			return
+
+		self.commands.append((layer, self.groups.setdefault(id(image), len(self.groups)), image, (x, y)))
+	# End: def RenderQueue.submit
+
+	def flush(self):
+		"""
+		Draws every queued command in order and empties the queue. Returns
+		the number of images drawn.
+		"""
+		commands = self.commands
+		count = len(commands)
+		rects = []
+		if count:
+			# Sorting on layer and group only keeps submission order within
+			# a group, since the sort is stable.
+			commands.sort(key=_command_order)
+			rects = self.surface.blits([command[2:] for command in commands], self.track_dirty)
+			if self.track_dirty:
+				# The background covers the whole screen, which would make
+				# every frame dirty everywhere.
+				background = 0
+				while background < count and commands[background][0] == LAYER_BACKGROUND:
+					background += 1
+				rects = rects[background:]
+			commands.clear()
+		if self.track_dirty:
+			self.dirty_rects = rects
+		self.groups.clear()
+
+		return count
+	# End: def RenderQueue.flush
+# End: class RenderQueue
+
+
+def _command_order(command):
+	return command[0], command[1]
+# End: def _command_order
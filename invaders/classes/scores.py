@@ -0,0 +1,127 @@
+"""
+Persistent high-score store: every finished game's score is appended to an
+SQLite database by a background thread, and the leaderboard is served from an
+in-memory top-N table so that the game loop never waits on disk.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class ScoreStore:
+	"""
+	Records game scores in the SQLite database at 'path'.
+
+	The database is only ever touched by the writer thread. On start it loads
+	the best 'top' scores through the score index, so the load costs the same
+	with a handful or millions of historical entries. After that, submit()
+	updates the cached table itself and queues the insert for the writer, and
+	leaderboard() reads the cache only.
+	"""
+
+	def __init__(self, path, top=10):
+		"""
+		Initializes the store without opening the database.
+		"""
+		self.path = path
+		self.top = max(1, int(top))
+		self.table = []
+		self.pending = queue.Queue()
+		self.loaded = threading.Event()
+		self.writer = None
+	# End: def ScoreStore.__init__
+
+	def start(self):
+		"""
+		Starts the writer thread and waits for it to load the leaderboard.
+		"""
+		self.writer = threading.Thread(target=self._write, name='ScoreStore', daemon=True)
+		self.writer.start()
+		self.loaded.wait()
+	# End: def ScoreStore.start
+
+	def submit(self, score):
+		"""
+		Records the score of a finished game. Returns the score's rank on the
+		leaderboard starting at 1, or None if it didn't make the table.
+		"""
+		entry = (score, time.time())
+		self.pending.put(entry)
+
+		table = self.table
+		rank = len(table)
+		while rank > 0 and table[rank - 1][0] < score:
+			rank -= 1
+		if rank >= self.top:
+			return None
+		table.insert(rank, entry)
+		del table[self.top:]
+
+		return rank + 1
+	# End: def ScoreStore.submit
+
+	def leaderboard(self):
+		"""
+		Returns the cached best scores as (score, time played) tuples, best
+		first.
+		"""
+		return self.table
+	# End: def ScoreStore.leaderboard
+
+	def stop(self):
+		"""
+		Waits for the writer thread to store every pending score and stops it.
+		"""
+		if self.writer is None:
+			return
+
+		self.pending.put(None)
+		self.writer.join()
+		self.writer = None
+	# End: def ScoreStore.stop
+
+	def _write(self):
+		"""
+		Writer thread main loop: opens the database, loads the leaderboard and
+		then inserts queued scores until told to stop. Scores queued together
+		are committed in one transaction. If the database can't be opened then
+		the leaderboard starts empty and scores are kept in memory only.
+		"""
+		connection = None
+		try:
+			directory = os.path.dirname(self.path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			connection = sqlite3.connect(self.path)
+			connection.execute('PRAGMA journal_mode=WAL')
+			connection.execute('CREATE TABLE IF NOT EXISTS scores (id INTEGER PRIMARY KEY, score INTEGER NOT NULL, played REAL NOT NULL)')
+			connection.execute('CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)')
+			connection.commit()
+			self.table = connection.execute('SELECT score, played FROM scores ORDER BY score DESC LIMIT ?', (self.top,)).fetchall()
+		except (OSError, sqlite3.Error) as error:
+			print(f'Scores will not be saved, {self.path} could not be opened: {error}')
+			if connection is not None:
+				connection.close()
+				connection = None
+		finally:
+			self.loaded.set()
+
+		try:
+			running = True
+			while running:
+				entries = [self.pending.get()]
+				while not self.pending.empty():
+					entries.append(self.pending.get())
+				if None in entries:
+					running = False
+					entries = [entry for entry in entries if entry is not None]
+				if entries and connection is not None:
+					with connection:
+						connection.executemany('INSERT INTO scores (score, played) VALUES (?, ?)', entries)
+		finally:
+			if connection is not None:
+				connection.close()
+	# End: def ScoreStore._write
+# End: class ScoreStore
@@ -0,0 +1,199 @@
+"""
+Warm start snapshots of the initialized game: the parsed config, resolved
+font paths, scaled sprite pixels and the enemy fleet layout are written to a
+versioned cache file once, and restored from a memory mapping on later
+launches so that startup and restarts skip parsing, font lookup, image
+decoding and fleet layout.
+
+The snapshot is keyed on the config file contents, the size and modification
+time of every file under the assets directory and the source of the code that
+builds the restored data, so editing any of them invalidates it
+automatically.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from classes import game_object
+from classes import ui
+
+SNAPSHOT_VERSION = 2
+
+# The code that shapes the snapshot contents: the sprites, the fleet layout
+# and this file's format
+_CLASSES_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FILES = (
+	os.path.join(_CLASSES_DIR, 'snapshot.py'),
+	os.path.join(_CLASSES_DIR, 'game_object.py'),
+	os.path.join(os.path.dirname(_CLASSES_DIR), 'invaders.py')
+)
+
+# Header: magic, format version, cache key digest, metadata length
+MAGIC = b'KISNAP'
+HEADER = struct.Struct('<6sH32sQ')
+ALIGNMENT = 16
+
+
+class Snapshot:
+	"""
+	A warm start cache file for one config file and assets directory.
+	"""
+
+	def __init__(self, path, config_file, assets_dir='assets'):
+		"""
+		Initializes the snapshot stored at 'path' for the given config file
+		and assets directory. Nothing is read until load() is called.
+		"""
+		self.path = path
+		self.config_file = config_file
+		self.assets_dir = assets_dir
+		self.config = None
+		self.fleet = None
+		self.loaded = False
+		self.mapping = None
+	# End: def Snapshot.__init__
+
+	def cache_key(self):
+		"""
+		Returns a digest of everything the snapshot was built from: the
+		snapshot format and pygame versions, the source of the code that
+		builds it, the config file contents and the size and modification
+		time of every asset file.
+		"""
+		digest = hashlib.sha256()
+		digest.update(f'{SNAPSHOT_VERSION}:{pygame.version.ver}'.encode())
+		for path in SOURCE_FILES:
+			try:
+				with open(path, 'rb') as f:
+					digest.update(f.read())
+			except OSError:
+				pass
+		try:
+			with open(self.config_file, 'rb') as f:
+				digest.update(f.read())
+		except OSError:
+			pass
+
+		for root, dirs, files in os.walk(self.assets_dir):
+			dirs.sort()
+			for name in sorted(files):
+				path = os.path.join(root, name)
+				stat = os.stat(path)
+				digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+
+		return digest.digest()
+	# End: def Snapshot.cache_key
+
+	def load(self):
+		"""
+		Maps the snapshot file and restores its contents if it is current.
+		Sprites are handed to the shared image cache as surfaces reading the
+		mapped pixels in place. Returns True if the snapshot was restored; a
+		snapshot that can't be decoded is treated as missing.
+		"""
+		try:
+			f = open(self.path, 'rb')
+		except OSError:
+			return False
+
+		with f:
+			try:
+				mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+			except ValueError:
+				return False
+
+		if len(mapping) < HEADER.size:
+			mapping.close()
+			return False
+		magic, version, key, meta_len = HEADER.unpack_from(mapping)
+		if magic != MAGIC or version != SNAPSHOT_VERSION or key != self.cache_key():
+			mapping.close()
+			return False
+
+		try:
+			meta = json.loads(mapping[HEADER.size:HEADER.size + meta_len])
+			view = memoryview(mapping)
+			start = _aligned(HEADER.size + meta_len)
+			images = {}
+			for sprite in meta['sprites']:
+				offset = start + sprite['offset']
+				pixels = view[offset:offset + sprite['length']]
+				images[(sprite['path'], sprite['width'], sprite['height'])] = pygame.image.frombuffer(
+					pixels, (sprite['width'], sprite['height']), sprite['format'])
+			fonts = dict(meta['fonts'])
+			config = meta['config']
+			fleet = meta['fleet']
+		except (ValueError, KeyError, TypeError, pygame.error) as error:
+			# The mapping is released with the partly decoded sprites viewing it
+			print(f'Ignoring damaged snapshot {self.path}: {error}')
+			return False
+
+		game_object._image_cache.update(images)
+		ui._font_paths.update(fonts)
+		self.config = config
+		self.fleet = fleet
+		self.mapping = mapping
+		self.loaded = True
+
+		return True
+	# End: def Snapshot.load
+
+	def save(self, config, fleet):
+		"""
+		Writes a snapshot of the given config map, the given fleet layout,
+		the resolved font paths and every cached sprite. Sprite pixels follow
+		the metadata, each aligned and located by its offset from the end of
+		the metadata. The file is replaced atomically so a concurrent launch
+		never maps a partial snapshot. The cache is best effort: if it can't
+		be written then a warning is printed and nothing is saved.
+		"""
+		sprites = []
+		blobs = []
+		offset = 0
+		for (path, width, height), image in game_object._image_cache.items():
+			format = 'RGBA' if image.get_flags() & pygame.SRCALPHA else 'RGBX'
+			pixels = pygame.image.tobytes(image, format)
+			sprites.append({'path': path, 'width': width, 'height': height, 'format': format,
+				'offset': offset, 'length': len(pixels)})
+			blobs.append(pixels)
+			offset += _aligned(len(pixels))
+
+		meta = {
+			'config': {section: dict(config[section]) for section in config},
+			'fonts': ui._font_paths,
+			'fleet': fleet,
+			'sprites': sprites
+		}
+		meta_bytes = json.dumps(meta).encode()
+		start = _aligned(HEADER.size + len(meta_bytes))
+
+		temp_path = f'{self.path}.{os.getpid()}.tmp'
+		try:
+			directory = os.path.dirname(self.path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			with open(temp_path, 'wb') as f:
+				f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, self.cache_key(), len(meta_bytes)))
+				f.write(meta_bytes)
+				f.write(bytes(start - HEADER.size - len(meta_bytes)))
+				for pixels in blobs:
+					f.write(pixels)
+					f.write(bytes(_aligned(len(pixels)) - len(pixels)))
+			os.replace(temp_path, self.path)
+		except OSError as error:
+			print(f'Snapshot {self.path} not saved: {error}')
+			try:
+				os.remove(temp_path)
+			except OSError:
+				pass
+	# End: def Snapshot.save
+# End: class Snapshot
+
+
+def _aligned(length):
+	return (length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+# End: def _aligned
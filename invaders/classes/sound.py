@@ -0,0 +1,138 @@
+"""
+Sound effects: every effect is decoded into memory at startup and played
+through a fixed pool of mixer channels, so playing one never touches the disk
+or creates objects.
+"""
+import pygame
+
+
+class SoundEffect:
+	"""
+	A decoded sound with its playback rules: a channel with a lower
+	'priority' playing may be stolen for it, it is not played again within
+	'interval_ms' of its last start, and at most 'voices' copies of it play
+	at once.
+	"""
+	__slots__ = ('sound', 'priority', 'interval', 'voices', 'last')
+
+	def __init__(self, path, volume=1.0, priority=0, interval_ms=0, voices=1):
+		self.sound = pygame.mixer.Sound(path)
+		self.sound.set_volume(volume)
+		self.priority = priority
+		self.interval = interval_ms
+		self.voices = max(1, voices)
+		self.last = -interval_ms
+	# End: def SoundEffect.__init__
+# End: class SoundEffect
+
+
+class SoundSystem:
+	"""
+	Plays named sound effects on a fixed pool of 'channels' mixer channels.
+
+	A new sound takes a free channel if there is one. Otherwise it steals the
+	channel playing the lowest priority sound, the oldest of those if several,
+	provided that priority isn't above its own; if every channel is busy with
+	more important sounds it is dropped. Bursts are rate limited per effect
+	by its minimum interval and voice count.
+
+	If no audio device can be opened the system stays silent, and play() does
+	nothing.
+	"""
+
+	def __init__(self, channels=8):
+		"""
+		Initializes the mixer, if it isn't already, and reserves the channel
+		pool.
+		"""
+		self.effects = {}
+		self.played = 0
+		self.stolen = 0
+		self.dropped = 0
+		self.enabled = True
+		if not pygame.mixer.get_init():
+			try:
+				pygame.mixer.init()
+			except pygame.error as error:
+				print(f'Sound disabled: {error}')
+				self.enabled = False
+				self.channels = []
+				return
+
+		channels = max(1, channels)
+		pygame.mixer.set_num_channels(channels)
+		self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+		self.priorities = [0] * channels
+		self.started = [0] * channels
+	# End: def SoundSystem.__init__
+
+	def load(self, name, path, volume=1.0, priority=0, interval_ms=0, voices=1):
+		"""
+		Decodes the sound file at the given path into memory as the named
+		effect.
+		"""
+		if self.enabled:
+			self.effects[name] = SoundEffect(path, volume, priority, interval_ms, voices)
+	# End: def SoundSystem.load
+
+	def play(self, name):
+		"""
+		Starts the named effect. Returns True if it is playing, or False if it
+		was rate limited, dropped or isn't loaded.
+		"""
+		effect = self.effects.get(name)
+		if effect is None:
+			return False
+
+		now = pygame.time.get_ticks()
+		if now - effect.last < effect.interval:
+			self.dropped += 1
+			return False
+
+		channels = self.channels
+		sound = effect.sound
+		free = -1
+		victim = -1
+		voices = 0
+		for i in range(len(channels)):
+			channel = channels[i]
+			if not channel.get_busy():
+				if free < 0:
+					free = i
+				continue
+			if channel.get_sound() is sound:
+				voices += 1
+			if victim < 0 or self.priorities[i] < self.priorities[victim] or (
+				self.priorities[i] == self.priorities[victim] and self.started[i] < self.started[victim]):
+				victim = i
+
+		if voices >= effect.voices:
+			self.dropped += 1
+			return False
+		if free < 0:
+			if self.priorities[victim] > effect.priority:
+				self.dropped += 1
+				return False
+			free = victim
+			self.stolen += 1
+
+		channels[free].play(sound)
+		self.priorities[free] = effect.priority
+		self.started[free] = now
+		effect.last = now
+		self.played += 1
+
+		return True
+	# End: def SoundSystem.play
+
+	def stop(self):
+		"""
+		Stops every channel and prints the playback totals.
+		"""
+		if not self.enabled:
+			return
+
+		pygame.mixer.stop()
+		print(f'Sound: played {self.played}, stolen {self.stolen}, dropped {self.dropped}')
+	# End: def SoundSystem.stop
+# End: class SoundSystem
@@ -0,0 +1,103 @@
+"""
+Capacity test for the game engine: plays the game automatically with an
+uncapped frame rate through stages of increasing fleet size, and prints the
+sustained frame rate and frame time percentiles of each stage.
+"""
+import time
+
+import util.config as cfg
+
+
+class StressTest:
+	"""
+	Drives a KamikazeInvaders instance through one stage per fleet size in
+	'stages', each lasting 'seconds'. The player sweeps back and forth
+	firing 'fire_rate' shots per second (0 for none). The fleet is respawned
+	whenever it is wiped out or reaches the player, so every stage keeps its
+	load; frames that respawn the fleet are left out of the timings.
+	"""
+
+	def __init__(self, game, stages, seconds=5.0, fire_rate=10.0):
+		self.game = game
+		self.stages = stages
+		self.seconds = seconds
+		self.fire_rate = fire_rate
+	# End: def StressTest.__init__
+
+	def run(self):
+		"""
+		Runs every stage in order, returning early if the window is closed
+		or Q is pressed.
+		"""
+		game = self.game
+		game.input.late_latch = False
+		# Shedding quality would skew the timings of later stages
+		game.governor = None
+		player = game._spawn_player()
+
+		print(f'Stress test: {len(self.stages)} stages of {self.seconds:g} s, bullet cap {game.bullet_cap}, fire rate {self.fire_rate:g}/s')
+		for enemies in self.stages:
+			cfg.config.set_value('enemies', str(enemies), 'FLEET')
+			game.fleet_layout = None
+			game._reset(player)
+			frame_times = self._run_stage(player)
+			if frame_times is None:
+				break
+			self._report(enemies, frame_times)
+	# End: def StressTest.run
+
+	def _run_stage(self, player):
+		game = self.game
+		fire_interval = 1.0 / self.fire_rate if self.fire_rate > 0 else None
+		next_shot = 0.0
+		direction = 1
+		frame_times = []
+
+		now = time.perf_counter()
+		deadline = now + self.seconds
+		while now < deadline:
+			started = now
+			if not game._check_events(player):
+				return None
+
+			if player.get_xpos() <= player.min_xpos:
+				direction = 1
+			elif player.get_xpos() >= player.max_xpos - player.get_width():
+				direction = -1
+			player.set_x_direction(direction)
+			if fire_interval and now >= next_shot:
+				game._fire_weapon(player, game.game_objects['bullets'])
+				next_shot = now + fire_interval
+
+			respawned = False
+			if game._refresh(game.game_objects) or not any(game.game_objects['enemies'].values()):
+				game._reset(player)
+				respawned = True
+			game._update(0)
+
+			now = time.perf_counter()
+			if not respawned:
+				frame_times.append(now - started)
+
+		return frame_times
+	# End: def StressTest._run_stage
+
+	def _report(self, enemies, frame_times):
+		frames = len(frame_times)
+		if frames == 0:
+			print(f'  {enemies:6d} enemies: no frames completed')
+			return
+
+		frame_times.sort()
+		total = sum(frame_times)
+		fleet = [enemy for group in self.game.game_objects['enemies'].values() for enemy in group]
+		visible = sum(1 for enemy in fleet if enemy.is_visible())
+
+		def percentile(fraction):
+			return frame_times[min(frames - 1, int(frames * fraction))] * 1000
+
+		print(f'  {enemies:6d} enemies: {frames / total:7.1f} fps, frame ms p50 {percentile(0.5):.2f} '
+			f'p95 {percentile(0.95):.2f} p99 {percentile(0.99):.2f} max {frame_times[-1] * 1000:.2f}, '
+			f'{visible} of {len(fleet)} on screen at the end')
+	# End: def StressTest._report
+# End: class StressTest
@@ -1,5 +1,6 @@
 import pygame
 
+from classes.render_queue import LAYER_UI
 
 # Color globals
 CLR_WHITE = (255, 255, 255)
@@ -7,10 +8,58 @@ CLR_BLACK = (0, 0, 0)
 CLR_BLUE = (0, 0, 255)
 CLR_RED = (255, 0, 0)
 CLR_PURPLE = (70, 1, 188)
+CLR_YELLOW = (250, 230, 85)
+
+# System font file paths by font name, resolved once per name
+_font_paths = {}
+
+def get_font(name, size):
+    """
+    Returns the named system font at the given size, falling back to the
+    default font if it isn't installed. The font file lookup is done once per
+    name, since scanning the system fonts is slow.
+    """
+    if name not in _font_paths:
+        _font_paths[name] = pygame.font.match_font(name)
+    return pygame.font.Font(_font_paths[name], size)
+# End: def get_font
+
+class ScoreHud:
+    """
+    Heads-up display of the player's score, drawn through the render queue.
+    The text is rendered again only when the score has changed and at least
+    'interval' frames have passed since the last render, so the refresh rate
+    can be lowered to save font renders under load.
+    """
+
+    def __init__(self, font, position=(10, 10), color=CLR_WHITE):
+        self.font = font
+        self.position = position
+        self.color = color
+        self.interval = 1
+        self.frames = 0
+        self.score = None
+        self.image = None
+    # End: def ScoreHud.__init__
+
+    def draw(self, queue, score):
+        """
+        Submits the score display to the given render queue.
+        """
+        self.frames += 1
+        if self.image is None or (score != self.score and self.frames >= self.interval):
+            self.image = self.font.render(f'Score: {score}', True, self.color)
+            self.score = score
+            self.frames = 0
+        queue.submit(LAYER_UI, self.image, self.position[0], self.position[1], self.image.get_width(), self.image.get_height())
+    # End: def ScoreHud.draw
+# End: class ScoreHud
+
 
 class QuitOrStartPanel:
     """
-    Displays an onscreen prompt to quit game or start over.
+    Displays an onscreen prompt to quit game or start over, with the score of
+    the game just played and the high-score leaderboard.
     """
 
     def __init__(self, screen, main):
@@ -19,8 +68,9 @@ class QuitOrStartPanel:
         self.screen = screen
         self.rect = pygame.Rect(258, 212, 286, 178)
         self.color = CLR_PURPLE
-        self.FONT1 = pygame.font.SysFont('comicsans', 52)
-        self.FONT2 = pygame.font.SysFont('comicsans', 36)
+        self.FONT1 = get_font('comicsans', 52)
+        self.FONT2 = get_font('comicsans', 36)
+        self.FONT3 = get_font('comicsans', 28)
 
 #        self.background = GameObject({
 #            'image': cfg.get_config_value('background', 'SCREEN'),
@@ -31,15 +81,35 @@ class QuitOrStartPanel:
 #            })
     # End: def AlienInvaders.__init__
 
-    def show(self, player):
+    def show(self, player, rank=None):
+        """
+        Shows the panel until the player quits or starts over. The leaderboard
+        entry at 'rank' (starting at 1) is highlighted as the new score.
+        """
         text = self.FONT1.render('Game Over', True, CLR_RED)
         text2 = self.FONT2.render('(Q) to quit', True, CLR_WHITE)
         text3 = self.FONT2.render('(Spc) to Start', True, CLR_WHITE)
+        score = self.FONT3.render(f'Score: {self.main.score}', True, CLR_WHITE)
+
+        leaderboard = []
+        if self.main.scores:
+            for i, (points, played) in enumerate(self.main.scores.leaderboard()):
+                color = CLR_YELLOW if i + 1 == rank else CLR_WHITE
+                leaderboard.append(self.FONT3.render(f'{i + 1:2d}.  {points}', True, color))
 
-        pygame.draw.rect(self.screen, self.color, self.rect)
-        self.screen.blit(text, (268, 211))
-        self.screen.blit(text2, (306, 274))
-        self.screen.blit(text3, (282, 318))
+        # The panel grows upward from its standard size to fit the scores
+        extra = 32 + (28 * len(leaderboard) + 8 if leaderboard else 0)
+        rect = self.rect.inflate(0, extra)
+        rect.y = self.rect.y - extra // 2
+        pygame.draw.rect(self.screen, self.color, rect)
+        self.screen.blit(text, (268, rect.y - 1))
+        self.screen.blit(score, (268 + (text.get_width() - score.get_width()) // 2, rect.y + 56))
+        ypos = rect.y + 96
+        for line in leaderboard:
+            self.screen.blit(line, (306, ypos))
+            ypos += 28
+        self.screen.blit(text2, (306, rect.bottom - 116))
+        self.screen.blit(text3, (282, rect.bottom - 72))
 
         start_game = False
         while True:
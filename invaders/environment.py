@@ -0,0 +1,378 @@
+"""
+Environment provides a Gym-style API for driving Kamikaze Invaders from
+automated players instead of the keyboard.
+
+Two classes are provided:
+* InvadersEnv - a single headless game instance
+* VectorInvadersEnv - N game instances stepped in lockstep, either in this
+  process or spread across worker processes
+
+Both must be used from the project root (as play.sh does) so that the config
+and asset paths resolve, e.g.:
+
+import environment as env
+game_env = env.InvadersEnv(observation=env.OBS_STATE)
+
+# Start an episode, returning the first observation...
+obs = game_env.reset(seed=42)
+
+# Advance the game one step, returning the observation, the points scored
+# during the step, whether the episode has ended and a map of extra info...
+obs, reward, done, info = game_env.step(env.ACTION_FIRE)
+
+# Step 16 games at once across 4 worker processes...
+vec_env = env.VectorInvadersEnv(16, workers=4)
+obs = vec_env.reset(seed=42)
+obs, rewards, dones, infos = vec_env.step([env.ACTION_LEFT] * 16)
+vec_env.close()
+"""
+import os
+import multiprocessing as mp
+
+import numpy as np
+import pygame
+
+import util.config as cfg
+
+from invaders import KamikazeInvaders
+
+# Observation types
+OBS_STATE = 'state'
+OBS_FRAME = 'frame'
+
+# Discrete actions, mapped to (x direction, fire weapon) in ACTIONS
+ACTION_NOOP = 0
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_FIRE = 3
+ACTION_LEFT_FIRE = 4
+ACTION_RIGHT_FIRE = 5
+ACTIONS = ((0, False), (-1, False), (1, False), (0, True), (-1, True), (1, True))
+
+# Values per enemy in a state observation: x, y, alive, on kamikaze run
+ENEMY_STATE_LEN = 4
+# Values for the player and its bullet: player x, player y, bullet x,
+# bullet y, bullet in play
+PLAYER_STATE_LEN = 5
+_DEAD_STATE = (0.0,) * ENEMY_STATE_LEN
+
+
+class InvadersEnv:
+	"""
+	A single headless game instance exposing reset() and step().
+	"""
+
+	def __init__(self, observation=OBS_STATE, frame_size=(84, 84), grayscale=True,
+			frame_skip=1, max_steps=0, config_file='config/game.ini'):
+		"""
+		Initializes the environment and its game instance.
+
+		The parameter 'observation' selects what step() and reset() return:
+			* OBS_STATE - a float32 vector of the player, bullet and enemy
+						  positions normalized to the screen size
+			* OBS_FRAME - a uint8 (height, width) frame downsampled to
+						  'frame_size', or (height, width, 3) if 'grayscale'
+						  is False
+		Each step repeats its action for 'frame_skip' game frames. If
+		'max_steps' is positive then episodes are truncated after that many
+		steps.
+
+		State observations skip rendering altogether: the game draws to a 1x1
+		surface so that every blit is clipped away.
+		"""
+		os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+		os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+		if cfg.config is None:
+			cfg.IniConfig(config_file)
+
+		self.observation = observation
+		self.frame_size = tuple(frame_size)
+		self.grayscale = grayscale
+		self.frame_skip = max(1, int(frame_skip))
+		self.max_steps = max_steps
+
+		pygame.init()
+		width = int(cfg.get_config_value('width', 'SCREEN'))
+		height = int(cfg.get_config_value('height', 'SCREEN'))
+		if observation == OBS_FRAME:
+			screen = pygame.Surface((width, height))
+			self.frame = pygame.Surface(self.frame_size)
+		elif observation == OBS_STATE:
+			screen = pygame.Surface((1, 1))
+			self.frame = None
+		else:
+			raise ValueError(f'Unknown observation type: {observation}')
+
+		self.game = KamikazeInvaders(screen, interactive=False)
+		self.game.input.late_latch = False
+		if observation == OBS_STATE:
+			self.game.particles = None
+		elif self.game.particles:
+			# Emissions must not depend on how long frames take to render
+			self.game.particles.budget = None
+		self.player = self.game._spawn_player()
+		self.fleet = []
+		self.steps = 0
+		self.scale = (float(width), float(height))
+	# End: def InvadersEnv.__init__
+
+	def reset(self, seed=None):
+		"""
+		Starts a new episode with a freshly spawned fleet and returns the
+		first observation. If 'seed' is given then the game's random
+		generator is seeded with it for a reproducible episode.
+		"""
+		if seed is not None:
+			self.game.rng.seed(seed)
+			if self.game.particles:
+				self.game.particles.seed(seed)
+		self.game._reset(self.player)
+		# The last action and scroll position of the previous episode must
+		# not carry over
+		self.player.set_x_direction(0)
+		self.game.background.reset()
+		self.fleet = [enemy for enemies in self.game.game_objects['enemies'].values() for enemy in enemies]
+		self.steps = 0
+		self.game._refresh(self.game.game_objects)
+
+		return self._observe()
+	# End: def InvadersEnv.reset
+
+	def step(self, action):
+		"""
+		Applies one of the ACTION_* values and advances the game. Returns a
+		tuple of (observation, reward, done, info) where reward is the sum of
+		EnemyCharacter.points for enemies shot during the step.
+		"""
+		x_direction, fire_weapon = ACTIONS[action]
+		game = self.game
+		player = self.player
+		score = game.score
+
+		player.set_x_direction(x_direction)
+		if fire_weapon:
+			game._fire_weapon(player, game.game_objects['bullets'])
+
+		done = False
+		for _ in range(self.frame_skip):
+			if game._refresh(game.game_objects) or player.has_died():
+				done = True
+				break
+			if not any(game.game_objects['enemies'].values()):
+				done = True
+				break
+
+		self.steps += 1
+		truncated = not done and self.max_steps > 0 and self.steps >= self.max_steps
+		info = {'score': game.score, 'steps': self.steps, 'truncated': truncated}
+
+		return self._observe(), float(game.score - score), done or truncated, info
+	# End: def InvadersEnv.step
+
+	def close(self):
+		"""
+		Releases the game's pygame resources.
+		"""
+		pygame.quit()
+	# End: def InvadersEnv.close
+
+	def _observe(self):
+		if self.observation == OBS_FRAME:
+			return self._observe_frame()
+		return self._observe_state()
+	# End: def InvadersEnv._observe
+
+	def _observe_state(self):
+		player = self.player
+		scale_x, scale_y = self.scale
+		values = [player.x_pos / scale_x, player.y_pos / scale_y]
+		bullets = self.game.game_objects['bullets']
+		if bullets:
+			values += (bullets[0].x_pos / scale_x, bullets[0].y_pos / scale_y, 1.0)
+		else:
+			values += _DEAD_STATE[:PLAYER_STATE_LEN-2]
+
+		# Plain list building is far cheaper than per-element array writes
+		for enemy in self.fleet:
+			if enemy.has_died():
+				values += _DEAD_STATE
+			else:
+				values += (enemy.x_pos / scale_x, enemy.y_pos / scale_y, 1.0, 1.0 if enemy.is_kamikaze() else 0.0)
+
+		return np.array(values, dtype=np.float32)
+	# End: def InvadersEnv._observe_state
+
+	def _observe_frame(self):
+		pygame.transform.scale(self.game.main_screen, self.frame_size, self.frame)
+		pixels = pygame.surfarray.pixels3d(self.frame)
+		if self.grayscale:
+			frame = (pixels[:, :, 0] * 0.299 + pixels[:, :, 1] * 0.587 + pixels[:, :, 2] * 0.114).astype(np.uint8).T
+		else:
+			frame = pixels.transpose(1, 0, 2).copy()
+		del pixels
+
+		return frame
+	# End: def InvadersEnv._observe_frame
+# End: class InvadersEnv
+
+
+class _EnvBatch:
+	"""
+	A list of environments stepped together, resetting each one as soon as
+	its episode ends. Used directly in process and inside each worker.
+	"""
+
+	def __init__(self, num_envs, env_kwargs):
+		self.envs = [InvadersEnv(**env_kwargs) for _ in range(num_envs)]
+	# End: def _EnvBatch.__init__
+
+	def reset(self, seeds):
+		return np.stack([env.reset(seed) for env, seed in zip(self.envs, seeds)])
+	# End: def _EnvBatch.reset
+
+	def step(self, actions):
+		count = len(self.envs)
+		observations = [None] * count
+		rewards = np.zeros(count, dtype=np.float32)
+		dones = np.zeros(count, dtype=np.bool_)
+		infos = [None] * count
+
+		for i, env in enumerate(self.envs):
+			obs, reward, done, info = env.step(actions[i])
+			if done:
+				info['terminal_observation'] = obs
+				obs = env.reset()
+			observations[i] = obs
+			rewards[i] = reward
+			dones[i] = done
+			infos[i] = info
+
+		return np.stack(observations), rewards, dones, infos
+	# End: def _EnvBatch.step
+
+	def close(self):
+		for env in self.envs:
+			env.close()
+	# End: def _EnvBatch.close
+# End: class _EnvBatch
+
+
+def _worker(conn, num_envs, env_kwargs):
+	"""
+	Runs a batch of environments in a worker process, serving commands sent
+	over the given pipe connection until told to close.
+	"""
+	batch = _EnvBatch(num_envs, env_kwargs)
+	try:
+		while True:
+			command, data = conn.recv()
+			if command == 'step':
+				conn.send(batch.step(data))
+			elif command == 'reset':
+				conn.send(batch.reset(data))
+			elif command == 'close':
+				break
+	except (EOFError, KeyboardInterrupt):
+		pass
+	finally:
+		batch.close()
+		conn.close()
+# End: def _worker
+
+
+class VectorInvadersEnv:
+	"""
+	Steps 'num_envs' game instances in lockstep. Environments whose episode
+	ends are reset automatically; the final observation of the ended episode
+	is kept in its info map under 'terminal_observation'.
+	"""
+
+	def __init__(self, num_envs, workers=0, context=None, **env_kwargs):
+		"""
+		Initializes the environments. If 'workers' is 0 then all of them are
+		stepped in this process, otherwise they are divided as evenly as
+		possible between that many worker processes. Each worker steps its
+		whole share per command, so inter-process traffic is one message per
+		worker per step. The optional 'context' names the multiprocessing
+		start method. Remaining keyword arguments are passed to InvadersEnv.
+		"""
+		self.num_envs = num_envs
+		self.batch = None
+		self.connections = []
+		self.processes = []
+		self.slices = []
+
+		if workers <= 0:
+			self.batch = _EnvBatch(num_envs, env_kwargs)
+			return
+
+		workers = min(workers, num_envs)
+		ctx = mp.get_context(context)
+		start = 0
+		for i in range(workers):
+			count = num_envs // workers + (1 if i < num_envs % workers else 0)
+			parent_conn, child_conn = ctx.Pipe()
+			process = ctx.Process(target=_worker, args=(child_conn, count, env_kwargs), daemon=True)
+			process.start()
+			child_conn.close()
+			self.connections.append(parent_conn)
+			self.processes.append(process)
+			self.slices.append(slice(start, start + count))
+			start += count
+	# End: def VectorInvadersEnv.__init__
+
+	def reset(self, seed=None):
+		"""
+		Resets every environment and returns their stacked observations. If
+		'seed' is given then environment i is seeded with seed + i.
+		"""
+		seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+		if self.batch is not None:
+			return self.batch.reset(seeds)
+
+		for conn, part in zip(self.connections, self.slices):
+			conn.send(('reset', seeds[part]))
+		return np.concatenate([conn.recv() for conn in self.connections])
+	# End: def VectorInvadersEnv.reset
+
+	def step(self, actions):
+		"""
+		Steps every environment with its action from 'actions'. Returns the
+		stacked observations, a float32 array of rewards, a bool array of done
+		flags and a list of info maps.
+		"""
+		if self.batch is not None:
+			return self.batch.step(actions)
+
+		for conn, part in zip(self.connections, self.slices):
+			conn.send(('step', actions[part]))
+		results = [conn.recv() for conn in self.connections]
+
+		observations = np.concatenate([result[0] for result in results])
+		rewards = np.concatenate([result[1] for result in results])
+		dones = np.concatenate([result[2] for result in results])
+		infos = [info for result in results for info in result[3]]
+
+		return observations, rewards, dones, infos
+	# End: def VectorInvadersEnv.step
+
+	def close(self):
+		"""
+		Shuts down the environments and any worker processes.
+		"""
+		if self.batch is not None:
+			self.batch.close()
+			self.batch = None
+
+		for conn in self.connections:
+			try:
+				conn.send(('close', None))
+			except (BrokenPipeError, OSError):
+				pass
+			conn.close()
+		for process in self.processes:
+			process.join(timeout=5)
+		self.connections = []
+		self.processes = []
+	# End: def VectorInvadersEnv.close
+# End: class VectorInvadersEnv
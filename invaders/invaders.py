@@ -3,103 +3,467 @@
 Kamikaze Invaders: a 'Space Invaders' and 'Galaga' inspired game developed
 with PyGame.
 """
+import argparse
+import math
+import os
+import random
+import time
 import pygame
 
 import util.config as cfg
 
-from classes.game_object import GameObject
+from classes.game_object import load_image
 from classes.movable_object import MovableObject, PLANE_X, PLANE_Y
 from classes.character import EnemyCharacter, PlayerCharacter
-from classes.ui import QuitOrStartPanel, CLR_WHITE
+from classes.ui import QuitOrStartPanel, ScoreHud, get_font
+from classes.capture import FrameRecorder
+from classes.alloc_tracker import AllocationTracker
+from classes.snapshot import Snapshot
+from classes.particles import ParticleSystem
+from classes.render_queue import RenderQueue, LAYER_ENEMIES, LAYER_BULLETS, LAYER_PLAYER
+from classes.input_handler import InputHandler
+from classes.stress import StressTest
+from classes.governor import QualityGovernor
+from classes.scores import ScoreStore
+from classes.sound import SoundSystem
+from classes.broadcast import Broadcaster
+from classes.background import ParallaxBackground
+
+# Explosion colors by enemy type
+EXPLOSION_COLORS = {
+	'beige': (235, 205, 160),
+	'green': (120, 225, 95),
+	'pink': (245, 135, 205),
+	'yellow': (250, 230, 85),
+	'blue': (105, 175, 250)
+}
+PLAYER_EXPLOSION_COLOR = (255, 150, 60)
+
+# Object settings that can be changed while the game runs, by lowercased
+# config key suffix, mapped to the object data key they initialize
+LIVE_OBJECT_SETTINGS = {
+	'speedx': 'speedx',
+	'speedy': 'speedy',
+	'points': 'points',
+	'kamikazechance': 'kamikaze_chance',
+	'image': 'image',
+	'image2': 'image2',
+	'imagew': 'iwidth',
+	'imageh': 'iheight'
+}
 
 class KamikazeInvaders:
-	def __init__(self):
-		# Initialize resources
+	def __init__(self, screen=None, snapshot=None, interactive=True):
+		"""
+		Initializes the game. If 'screen' is given then the game draws to that
+		surface instead of opening a display window, e.g. for running
+		headless instances. If a warm start 'snapshot' is given then the
+		fleet layout is taken from it when it was loaded, and it is saved
+		once the game is initialized when it wasn't. If 'interactive' is
+		False then sound, recording, the high-score store and the spectator
+		broadcast, which only serve a game being played, are not set up.
+		"""
+		# Initialize resources, with a small mixer buffer for prompt effects
+		pygame.mixer.pre_init(44100, -16, 2, 512)
 		pygame.init()
 		pygame.font.init()
-		self.FONT1 = pygame.font.SysFont('comicsans', 52)
-		self.FONT2 = pygame.font.SysFont('comicsans', 36)
+		self.FONT1 = get_font('comicsans', 52)
+		self.FONT2 = get_font('comicsans', 36)
 		self.CLOCK_RATE = int(cfg.get_config_value('framerate', 'SCREEN'))
 		self.game_objects = {'player': None, 'helper': None, 'enemies': [], 'bullets': [], 'powerups': [], 'kamikazes': []}
-		self.max_bullets = 1
+		self.bullet_cap = int(cfg.get_config_value_default('bullets', 'WEAPON', 1))
+		self.max_bullets = self.bullet_cap
 		self.max_kamikazes = 1
+		self.score = 0
+		self.rng = random.Random()
+		self.snapshot = snapshot
+		self.fleet_layout = snapshot.fleet if snapshot else None
 
 		# Set up the main screen
-		pygame.display.set_caption(cfg.get_config_value('title', 'META'))
 		self.width = int(cfg.get_config_value('width', 'SCREEN'))
 		self.height = int(cfg.get_config_value('height', 'SCREEN'))
-		self.main_screen = pygame.display.set_mode((self.width, self.height))
-		self.background = GameObject({
-			'image': cfg.get_config_value('background', 'SCREEN'),
-			'xpos': 0,
-			'ypos': 0,
-			'iwidth': self.width,
-			'iheight': self.height
-			})
+		if screen is None:
+			pygame.display.set_caption(cfg.get_config_value('title', 'META'))
+			self.main_screen = pygame.display.set_mode((self.width, self.height))
+		else:
+			self.main_screen = screen
+		try:
+			speeds = _parse_speeds(cfg.get_config_value_default('speeds', 'BACKGROUND', '0'))
+		except ValueError as error:
+			print(f'Background speeds ignored: {error}')
+			speeds = [0.0]
+		self.background = ParallaxBackground(self.main_screen,
+			cfg.get_config_value('background', 'SCREEN'), speeds,
+			int(cfg.get_config_value_default('stars', 'BACKGROUND', 120)))
+		self.render_queue = RenderQueue(self.main_screen, True)
+		self.background_interval = 1
+		self.redraw_countdown = 0
+		self.repaint = True
+		self.dirty_present = False
+		self.drawn_rects = []
+		self.present_rects = None
 		
 		# Set up supporting UI elements
 		self.quit_or_start_panel = QuitOrStartPanel(self.main_screen, self)
+		self.hud = ScoreHud(get_font('comicsans', 24))
+		self.input = InputHandler(
+			cfg.get_config_flag('late_latch', 'INPUT'),
+			cfg.get_config_flag('measure_latency', 'INPUT'))
+
+		# Set up particle effects
+		self.particles = None
+		if cfg.get_config_flag('particles', 'EFFECTS', True):
+			self.particles = ParticleSystem(
+				int(cfg.get_config_value_default('max', 'EFFECTS', 20000)),
+				float(cfg.get_config_value_default('budget', 'EFFECTS', 2.0)))
+
+		# Set up optional gameplay recording
+		self.recorder = None
+		if interactive and cfg.get_config_flag('enabled', 'CAPTURE'):
+			self.recorder = FrameRecorder(self.main_screen,
+				cfg.get_config_value_default('output', 'CAPTURE', 'capture/gameplay.rgb'),
+				cfg.get_config_value_default('format', 'CAPTURE', 'raw'),
+				int(cfg.get_config_value_default('buffer', 'CAPTURE', 32)),
+				int(cfg.get_config_value_default('interval', 'CAPTURE', 1)))
+
+		# Set up optional allocation instrumentation
+		self.tracker = None
+		if cfg.get_config_flag('allocations', 'DEBUG'):
+			self.tracker = AllocationTracker(
+				int(cfg.get_config_value_default('interval', 'DEBUG', 600)),
+				int(cfg.get_config_value_default('top', 'DEBUG', 10)))
+
+		# Set up sound effects, all decoded up front
+		self.sounds = None
+		if interactive and cfg.get_config_flag('enabled', 'SOUND', True):
+			self.sounds = SoundSystem(int(cfg.get_config_value_default('channels', 'SOUND', 8)))
+			for name in cfg.get_config_value_default('effects', 'SOUND', '').split(','):
+				name = name.strip()
+				if name:
+					self.sounds.load(name, cfg.get_config_value(f'{name}File', 'SOUND'),
+						float(cfg.get_config_value_default(f'{name}Volume', 'SOUND', 1.0)),
+						int(cfg.get_config_value_default(f'{name}Priority', 'SOUND', 0)),
+						int(cfg.get_config_value_default(f'{name}Interval', 'SOUND', 0)),
+						int(cfg.get_config_value_default(f'{name}Voices', 'SOUND', 1)))
+
+		# Set up the high-score store
+		self.scores = None
+		if interactive and cfg.get_config_flag('enabled', 'SCORES', True):
+			self.scores = ScoreStore(
+				cfg.get_config_value_default('path', 'SCORES', 'scores/scores.db'),
+				int(cfg.get_config_value_default('top', 'SCORES', 5)))
+
+		# Set up the optional spectator broadcast
+		self.broadcaster = None
+		if interactive and cfg.get_config_flag('enabled', 'BROADCAST'):
+			self.broadcaster = Broadcaster(
+				cfg.get_config_value_default('address', 'BROADCAST', '127.0.0.1:8765'),
+				self.width, self.height,
+				int(cfg.get_config_value_default('buffer', 'BROADCAST', 65536)))
+
+		# Set up adaptive rendering quality
+		self.governor = None
+		if cfg.get_config_flag('adaptive', 'QUALITY'):
+			self.governor = QualityGovernor(self.CLOCK_RATE,
+				degrade_frames=int(cfg.get_config_value_default('degrade_frames', 'QUALITY', 15)),
+				restore_frames=int(cfg.get_config_value_default('restore_frames', 'QUALITY', 120)),
+				restore_ratio=float(cfg.get_config_value_default('restore_ratio', 'QUALITY', 0.7)))
+		self.frame_started = time.perf_counter()
 	# End: def KamikazeInvaders.__init__
 
 	def run(self):
 		# Initialize game objects
-		data = get_object_data('player')
-		data['bidirectional_x'] = False
-		data['min_xpos'] = 10
-		data['max_xpos'] = self.width - 10
-		player = PlayerCharacter(data)
-		self.game_objects['player'] = player
+		player = self._spawn_player()
 		self._reset(player)
+		if self.snapshot and not self.snapshot.loaded:
+			self.snapshot.save(cfg.config.config_map, self.fleet_layout)
 
 		# Play!
 		self.clock = pygame.time.Clock()
+		if self.recorder:
+			self.recorder.start()
+		if self.tracker:
+			self.tracker.start()
+		if self.scores:
+			self.scores.start()
+		if self.broadcaster and not self.broadcaster.start():
+			self.broadcaster = None
+		if cfg.get_config_flag('hot_reload', 'DEBUG'):
+			cfg.config.watch(float(cfg.get_config_value_default('reload_interval', 'DEBUG', 0.5)))
 		DO_LOOP = True
 		self._reset(player)
 		while DO_LOOP:
+			self._reload_config()
+			self._track('events')
 			DO_LOOP = self._check_events(player)
+			rank = None
 			if DO_LOOP:
+				self._track('refresh')
 				DO_LOOP = not self._refresh(self.game_objects)
+				if not DO_LOOP and self.scores:
+					rank = self.scores.submit(self.score)
+				self._track('update')
 				self._update(self.CLOCK_RATE)
+			self._track(None)
 			if not DO_LOOP:
-				DO_LOOP = self.quit_or_start_panel.show(player)
+				DO_LOOP = self.quit_or_start_panel.show(player, rank)
 
 		# That's all folks!
+		if self.recorder:
+			self.recorder.stop()
+		if self.tracker:
+			self.tracker.stop()
+		if self.scores:
+			self.scores.stop()
+		if self.sounds:
+			self.sounds.stop()
+		if self.broadcaster:
+			self.broadcaster.stop()
+		if self.input.measure:
+			self.input.report()
 		pygame.quit()
 	# End: def KamikazeInvaders.run
 
+	def _track(self, phase):
+		"""
+		Marks the start of the named game loop phase for allocation tracking,
+		or the end of the frame if 'phase' is None.
+		"""
+		if self.tracker:
+			self.tracker.phase(phase)
+	# End: def KamikazeInvaders._track
+
+	def _reload_config(self):
+		"""
+		Applies any changes to the config file to the running game. Called at
+		frame boundaries only, so objects never see a half applied change. A
+		value that can't be applied, such as a typo or a half saved edit, is
+		reported and the old value kept. Values only read at startup are
+		reported as needing a restart.
+		"""
+		changes = cfg.config.poll()
+		applied = 0
+		restart = []
+		for (section, key), (old_value, value) in changes.items():
+			try:
+				if self._apply_config_change(section, key, value):
+					applied += 1
+				else:
+					restart.append(f'[{section}] {key}')
+			except (ValueError, OSError, pygame.error) as error:
+				print(f'Config value [{section}] {key} = {value!r} rejected, keeping {old_value!r}: {error}')
+				if old_value is not None:
+					cfg.config.set_value(key, old_value, section)
+		if changes:
+			print(f'Config reloaded: {applied} of {len(changes)} changed values applied')
+		if restart:
+			print(f'Config values taking effect after a restart: {", ".join(restart)}')
+	# End: def KamikazeInvaders._reload_config
+
+	def _apply_config_change(self, section, key, value):
+		"""
+		Applies one changed config value. Returns False if the value isn't
+		applied to a running game. Raises ValueError, leaving the game
+		unchanged, if the value is invalid.
+		"""
+		if section == 'SCREEN' and key == 'framerate':
+			framerate = _parse_int(value, 1)
+			self.CLOCK_RATE = framerate
+			if self.governor:
+				self.governor.set_framerate(framerate)
+		elif section == 'WEAPON' and key == 'bullets':
+			self.bullet_cap = _parse_int(value, 0)
+			self.max_bullets = self.bullet_cap
+		elif section == 'BACKGROUND' and key == 'speeds':
+			self.background.set_speeds(_parse_speeds(value))
+		elif section == 'FLEET' and key in ('rows', 'columns', 'enemies'):
+			_parse_int(value, 0 if key == 'enemies' else 1)
+			# Fleet shape changes take effect on the next spawn
+			self.fleet_layout = None
+		elif section == 'OBJECTS':
+			return self._apply_object_setting(key, value)
+		else:
+			return False
+
+		return True
+	# End: def KamikazeInvaders._apply_config_change
+
+	def _apply_object_setting(self, key, value):
+		"""
+		Applies a changed OBJECTS config value to the live objects of its type
+		and to the fleet layout used by later spawns. Only the sprites of the
+		affected objects are reloaded. Returns False if the setting isn't one
+		that can be applied live.
+		"""
+		object_type = None
+		for prefix in ('player', 'bullet') + tuple(f'{color}enemy' for color in EXPLOSION_COLORS):
+			setting = key[len(prefix):]
+			if key.startswith(prefix) and setting in LIVE_OBJECT_SETTINGS:
+				object_type = prefix
+				break
+		if object_type is None:
+			return False
+		if setting in ('image', 'image2'):
+			# Only a death image may be left out
+			if (value or setting == 'image') and not os.path.isfile(value):
+				raise ValueError(f'no image file {value!r}')
+		elif setting in ('imagew', 'imageh'):
+			value = _parse_int(value, 1)
+		else:
+			value = _parse_int(value)
+
+		if object_type == 'player':
+			objects = [self.game_objects['player']]
+		elif object_type == 'bullet':
+			objects = self.game_objects['bullets']
+		else:
+			color = object_type[:-len('enemy')]
+			objects = self.game_objects['enemies'].get(color, [])
+			if self.fleet_layout:
+				for data in self.fleet_layout.get(color, []):
+					data[LIVE_OBJECT_SETTINGS[setting]] = value
+
+		for game_object in objects:
+			if game_object is None:
+				continue
+			if setting == 'speedx':
+				game_object.MOVE_X_RATE = int(math.copysign(value, game_object.MOVE_X_RATE))
+			elif setting == 'speedy':
+				if hasattr(game_object, 'FLEET_Y_RATE'):
+					game_object.FLEET_Y_RATE = value
+				else:
+					game_object.MOVE_Y_RATE = int(math.copysign(value, game_object.MOVE_Y_RATE))
+			elif setting == 'points':
+				game_object.points = value
+			elif setting == 'kamikazechance':
+				game_object.kamikaze_chance = value
+			else:
+				if setting == 'image':
+					game_object.image1 = value
+				elif setting == 'image2':
+					game_object.image2 = value
+				elif setting == 'imagew':
+					game_object.width = value
+				else:
+					game_object.height = value
+				if game_object.has_died() and game_object.image2:
+					game_object.image = load_image(game_object.image2, game_object.width, game_object.height)
+				else:
+					game_object.image = load_image(game_object.image1, game_object.width, game_object.height)
+
+		return True
+	# End: def KamikazeInvaders._apply_object_setting
+
 	def _reset(self, player):
 		player.reset()
-		self.max_bullets = 1
+		self.max_bullets = self.bullet_cap
+		self.score = 0
 		self.game_objects['enemies'] = self._spawn_enemies(player.get_ypos()+player.get_height())
 		self.game_objects['helper'] = None
 		self.game_objects['bullets'] = []
 		self.game_objects['powerups'] = []
+		self.game_objects['kamikazes'] = []
+		if self.particles:
+			self.particles.clear()
+		self.repaint = True
 	# End: KamikazeInvaders._reset
 
-	def _spawn_enemies(self, max_ypos):
+	def _apply_quality(self, settings):
 		"""
-		Creates the enemies to shoot and spawns them at the top of the screen.
+		Applies a quality level's settings from the governor.
 		"""
-		enemies = {'beige': [], 'green': [], 'pink': [], 'yellow': [], 'blue': []}
-		ypos = 10
-		for enemy_type in enemies:
+		if self.particles:
+			self.particles.density = settings['particles']
+		self.background_interval = settings['background']
+		self.hud.interval = settings['hud']
+		self.dirty_present = settings['dirty_rects']
+	# End: def KamikazeInvaders._apply_quality
+
+	def _spawn_player(self):
+		"""
+		Creates the player character at the bottom center of the screen.
+		"""
+		data = get_object_data('player')
+		data['bidirectional_x'] = False
+		data['min_xpos'] = 10
+		data['max_xpos'] = self.width - 10
+		data['layer'] = LAYER_PLAYER
+		player = PlayerCharacter(data)
+		self.game_objects['player'] = player
+
+		return player
+	# End: def KamikazeInvaders._spawn_player
+
+	def _fleet_layout(self, max_ypos):
+		"""
+		Returns the initialization data of every enemy in the fleet by enemy
+		type, laid out in rows at the top of the screen. The fleet's rows and
+		columns, or its total enemy count, come from the FLEET config. Rows
+		past the fifth are stacked above the screen so that the bottom five
+		rows keep their standard positions, and descend into view as the
+		fleet drops.
+		"""
+		columns = int(cfg.get_config_value_default('columns', 'FLEET', 10))
+		rows = int(cfg.get_config_value_default('rows', 'FLEET', 5))
+		count = int(cfg.get_config_value_default('enemies', 'FLEET', 0))
+		if count > 0:
+			rows = -(-count // columns)
+		else:
+			count = rows * columns
+
+		layout = {'beige': [], 'green': [], 'pink': [], 'yellow': [], 'blue': []}
+		enemy_types = list(layout)
+		type_data = {}
+		for enemy_type in enemy_types:
 			data = get_object_data(f'{enemy_type}Enemy')
 			data['bidirectional_x'] = True
 			data['bidirectional_y'] = False
+			data['layer'] = LAYER_ENEMIES
+			type_data[enemy_type] = data
+
+		row_ypos = []
+		ypos = 10
+		for row in range(rows):
+			row_ypos.append(ypos)
+			ypos += type_data[enemy_types[row % len(enemy_types)]]['iheight'] + 10
+		if rows > len(enemy_types):
+			shift = row_ypos[rows - len(enemy_types)] - 10
+			row_ypos = [ypos - shift for ypos in row_ypos]
+
+		for row in range(rows):
+			enemy_type = enemy_types[row % len(enemy_types)]
+			data = type_data[enemy_type]
 			enemy_width = int(data['iwidth'] * 1.5)
-			total_width = enemy_width * 10
+			total_width = enemy_width * columns
 			xpos = (self.width - total_width) // 2
-			movement = xpos - 10
-			for i in range(10):
+			movement = max(xpos - 10, 0)
+			for i in range(min(columns, count - row * columns)):
 				data['xpos'] = xpos
-				data['ypos'] = ypos
+				data['ypos'] = row_ypos[row]
 				data['min_xpos'] = xpos - movement
 				data['max_xpos'] = xpos + enemy_width + movement
 				data['max_ypos'] = max_ypos
-				enemy = EnemyCharacter(data.copy())
-				enemies[enemy_type].append(enemy)
+				layout[enemy_type].append(data.copy())
 				xpos += enemy_width
-			ypos = data['ypos'] + data['iheight'] + 10
+
+		return layout
+	# End: def KamikazeInvaders._fleet_layout
+
+	def _spawn_enemies(self, max_ypos):
+		"""
+		Creates the enemies to shoot and spawns them at the top of the screen.
+		The fleet layout is computed once and reused by later spawns.
+		"""
+		if self.fleet_layout is None:
+			self.fleet_layout = self._fleet_layout(max_ypos)
+
+		enemies = {}
+		for enemy_type, layout in self.fleet_layout.items():
+			enemies[enemy_type] = []
+			for data in layout:
+				data = data.copy()
+				data['rng'] = self.rng
+				enemies[enemy_type].append(EnemyCharacter(data))
 
 		return enemies
 	# End: def KamikazeInvaders._spawn_enemies
@@ -118,9 +482,12 @@ class KamikazeInvaders:
 			data['min_ypos'] = 0
 			data['max_ypos'] = self.height
 			data['bidirectional_y'] = False
+			data['layer'] = LAYER_BULLETS
 			bullet = MovableObject(data)
 			bullet.switch_direction(PLANE_Y)
 			bullets.append(bullet)
+			if self.sounds:
+				self.sounds.play('fire')
 	# End: def KamikazeInvaders._fire_weapon
 
 	def _is_hit(self, enemy, bullets):
@@ -142,7 +509,7 @@ class KamikazeInvaders:
 		is_running = not end_loop
 		fire_weapon = False
 
-		for event in pygame.event.get():
+		for event in self.input.events():
 			if event.type == pygame.QUIT:
 				if end_loop:
 					is_running = True
@@ -174,19 +541,42 @@ class KamikazeInvaders:
 	# End: def KamikazeInvaders._check_events
  
 	def _update(self, wait_time):
-		pygame.display.update()
-		self.clock.tick(wait_time)
+		if self.recorder:
+			self.recorder.capture(self.main_screen)
+		if self.present_rects is not None:
+			pygame.display.update(self.present_rects)
+			self.present_rects = None
+		else:
+			pygame.display.update()
+		self.input.presented()
+		if self.broadcaster:
+			self.broadcaster.publish(self.game_objects, self.score)
+		if self.governor and self.governor.update(time.perf_counter() - self.frame_started):
+			self._apply_quality(self.governor.settings())
+		self.input.wait(self.clock, wait_time)
+		self.frame_started = time.perf_counter()
 	# End: def KamikazeInvaders._update
 
 	def _refresh(self, game_objects):
-		self.main_screen.fill(CLR_WHITE)
-		self.background.draw(self.main_screen)
+		queue = self.render_queue
+		repaint = self.repaint
+		background_changed = False
+		self.background.scroll()
+		self.redraw_countdown -= 1
+		if repaint or self.redraw_countdown <= 0:
+			self.redraw_countdown = self.background_interval
+			background_changed = self.background.draw(queue)
+		else:
+			# Only repair the areas drawn over last frame, from the background
+			# as it was last drawn
+			backdrop = self.background.backdrop
+			self.main_screen.blits([(backdrop, rect, rect) for rect in self.drawn_rects], False)
 
 		end_game = False
 		player = game_objects['player']
 
 		for bullet in game_objects['bullets']:
-			bullet.update(PLANE_Y, self.main_screen)
+			bullet.update(PLANE_Y, queue)
 			if not bullet.is_movable():
 				game_objects['bullets'].remove(bullet)
 
@@ -194,11 +584,18 @@ class KamikazeInvaders:
 			enemies = game_objects['enemies'][enemy_color]
 			for enemy in enemies:
 				if self._is_hit(enemy, self.game_objects['bullets']):
+					self.score += enemy.points
 					enemy.die(True)
-					enemy.draw(self.main_screen)
+					enemy.draw(queue)
+					if self.sounds:
+						self.sounds.play('explosion')
+					if self.particles:
+						center_x = enemy.get_xpos() + enemy.get_width() // 2
+						self.particles.explode(center_x, enemy.get_ypos() + enemy.get_height() // 2, EXPLOSION_COLORS[enemy_color])
+						self.particles.sparks(center_x, enemy.get_ypos() + enemy.get_height())
 				else:
 					if not enemy.has_died():
-						end_run = enemy.update(PLANE_X, self.main_screen, player, len(self.game_objects['kamikazes']) < self.max_kamikazes)
+						end_run = enemy.update(PLANE_X, queue, player, len(self.game_objects['kamikazes']) < self.max_kamikazes)
 					if enemy.has_died():
 						enemies.remove(enemy)
 						if enemy.is_kamikaze():
@@ -210,13 +607,61 @@ class KamikazeInvaders:
 					end_game = player.has_died()
 
 		if player.is_movable():
-			player.update(PLANE_X, self.main_screen)
+			self.input.latch(player)
+			player.update(PLANE_X, queue)
+		self.hud.draw(queue, self.score)
+		queue.flush()
+
+		if end_game and self.sounds:
+			self.sounds.play('death')
+		if self.particles:
+			center_x = player.get_xpos() + player.get_width() // 2
+			if end_game:
+				self.particles.explode(center_x, player.get_ypos() + player.get_height() // 2, PLAYER_EXPLOSION_COLOR, 1200, 6.0, 60)
+			else:
+				self.particles.trail(center_x, player.get_ypos() + player.get_height())
+			self.particles.update_and_draw(self.main_screen)
+
+		# Unless the background moved, everything outside the areas drawn
+		# this frame and last frame is unchanged, so presenting just those is
+		# enough after the first frame
+		drawn = list(queue.dirty_rects)
+		if self.particles and self.particles.drawn_rect:
+			drawn.append(self.particles.drawn_rect)
+		if self.dirty_present and not repaint and not background_changed:
+			self.present_rects = self.drawn_rects + drawn
+		self.drawn_rects = drawn
+		self.repaint = False
 
 		return end_game
 	# End: def KamikazeInvaders._refresh
 # End: class KamikazeInvaders
 
 
+def _parse_int(value, minimum=None):
+	"""
+	Returns the config value as an int. Raises ValueError if it isn't one or
+	is below 'minimum'.
+	"""
+	number = int(value)
+	if minimum is not None and number < minimum:
+		raise ValueError(f'must be at least {minimum}')
+	return number
+# End: def _parse_int
+
+
+def _parse_speeds(value):
+	"""
+	Returns the comma separated background layer speeds as floats. Raises
+	ValueError unless every speed is a finite number.
+	"""
+	speeds = [float(speed) for speed in value.split(',')]
+	if not all(math.isfinite(speed) for speed in speeds):
+		raise ValueError('speeds must be finite')
+	return speeds
+# End: def _parse_speeds
+
+
 def get_object_data(key_type, index=1, max=1):
 	data = {}
 	data['image'] = cfg.get_config_value(f'{key_type}Image', 'OBJECTS')
@@ -239,7 +684,50 @@ def get_object_data(key_type, index=1, max=1):
 
 # Get the show on the road!
 if __name__ == '__main__':
-	config = cfg.IniConfig('config/game.ini')
-	game = KamikazeInvaders()
-	game.run()
+	parser = argparse.ArgumentParser(description='Kamikaze Invaders')
+	parser.add_argument('--stress', action='store_true', help='run the engine capacity test instead of the game')
+	parser.add_argument('--stages', help='comma separated fleet sizes for the capacity test')
+	parser.add_argument('--seconds', type=float, help='length of each capacity test stage in seconds')
+	parser.add_argument('--fire-rate', type=float, help='capacity test shots per second')
+	parser.add_argument('--rows', type=int, help='enemy fleet rows')
+	parser.add_argument('--columns', type=int, help='enemy fleet columns')
+	parser.add_argument('--enemies', type=int, help='enemy fleet size, overriding rows')
+	parser.add_argument('--bullets', type=int, help='maximum bullets in play')
+	parser.add_argument('--broadcast', metavar='ADDRESS', help='broadcast to spectators at host:port or unix:path')
+	args = parser.parse_args()
+	overrides = {
+		('rows', 'FLEET'): args.rows,
+		('columns', 'FLEET'): args.columns,
+		('enemies', 'FLEET'): args.enemies,
+		('bullets', 'WEAPON'): args.bullets,
+		('stages', 'STRESS'): args.stages,
+		('seconds', 'STRESS'): args.seconds,
+		('fire_rate', 'STRESS'): args.fire_rate,
+		('enabled', 'BROADCAST'): 'true' if args.broadcast else None,
+		('address', 'BROADCAST'): args.broadcast
+	}
+	overrides = {key: value for key, value in overrides.items() if value is not None}
+
+	snapshot = Snapshot('cache/warmstart.snap', 'config/game.ini')
+	if snapshot.load():
+		config = cfg.IniConfig('config/game.ini', snapshot.config)
+	else:
+		config = cfg.IniConfig('config/game.ini')
+	for (key, section), value in overrides.items():
+		config.set_value(key, str(value), section)
+
+	# A snapshot only matches the config file as written, and one saved now
+	# would keep the overrides for later launches
+	if overrides or args.stress:
+		snapshot = None
+	game = KamikazeInvaders(snapshot=snapshot)
+	if args.stress:
+		game.clock = pygame.time.Clock()
+		stages = [int(stage) for stage in cfg.get_config_value_default('stages', 'STRESS', '50').split(',')]
+		StressTest(game, stages,
+			float(cfg.get_config_value_default('seconds', 'STRESS', 5)),
+			float(cfg.get_config_value_default('fire_rate', 'STRESS', 10))).run()
+		pygame.quit()
+	else:
+		game.run()
 	quit()
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""
+Spectator viewer for Kamikaze Invaders: connects to a game's broadcast
+server, reconstructs the game objects from the stream and renders them, in a
+window or headless.
+"""
+import argparse
+import os
+import select
+import socket
+import time
+import pygame
+
+import util.config as cfg
+
+from classes.broadcast import SpectatorState, KINDS, KIND_DYING
+from classes.game_object import load_image
+from classes.ui import CLR_WHITE, get_font
+
+
+class Viewer:
+	"""
+	Renders a broadcast game. Headless viewers render to an offscreen surface
+	and print the stream statistics once a second instead of opening a window.
+	"""
+
+	def __init__(self, address, headless=False, framerate=60):
+		"""
+		Connects to the broadcast server at 'address', either 'host:port' or
+		'unix:path'.
+		"""
+		self.headless = headless
+		self.framerate = framerate
+		if address.startswith('unix:'):
+			self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			self.socket.connect(address[len('unix:'):])
+		else:
+			host, port = address.rsplit(':', 1)
+			self.socket = socket.create_connection((host, int(port)))
+		self.state = SpectatorState()
+		self.screen = None
+		self.sprites = None
+		self.received = 0
+		self.messages = 0
+	# End: def Viewer.__init__
+
+	def run(self, seconds=None, save=None):
+		"""
+		Renders the stream until the server closes it, the window is closed or
+		'seconds' have passed. The last frame is saved to the image file
+		'save' if given.
+		"""
+		state = self.state
+		clock = pygame.time.Clock()
+		started = time.perf_counter()
+		next_report = started + 1.0
+		running = True
+		while running:
+			readable, _, _ = select.select([self.socket], [], [], 1.0 / self.framerate)
+			if readable:
+				data = self.socket.recv(65536)
+				if not data:
+					break
+				self.received += len(data)
+				self.messages += state.feed(data)
+
+			if state.synced:
+				if self.screen is None:
+					self._open(state.width, state.height)
+				self._draw()
+
+			if not self.headless:
+				for event in pygame.event.get():
+					if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
+						running = False
+				clock.tick(self.framerate)
+
+			now = time.perf_counter()
+			if self.headless and now >= next_report:
+				print(f'Frame {state.frame}: {len(state.objects)} objects, score {state.score}, '
+					f'{self.messages} messages, {self.received / (now - started) / 1024:.1f} KB/s')
+				next_report = now + 1.0
+			if seconds is not None and now - started >= seconds:
+				running = False
+
+		if save and self.screen is not None:
+			pygame.image.save(self.screen, save)
+		self.socket.close()
+	# End: def Viewer.run
+
+	def _open(self, width, height):
+		"""
+		Opens the window, or the offscreen surface when headless, and loads
+		the sprites.
+		"""
+		if self.headless:
+			self.screen = pygame.Surface((width, height))
+		else:
+			pygame.display.set_caption(f"{cfg.get_config_value('title', 'META')} (spectator)")
+			self.screen = pygame.display.set_mode((width, height))
+		self.background = load_image(cfg.get_config_value('background', 'SCREEN'), width, height)
+		self.font = get_font('comicsans', 24)
+
+		self.sprites = []
+		for kind in KINDS:
+			width = int(cfg.get_config_value(f'{kind}ImageW', 'OBJECTS'))
+			height = int(cfg.get_config_value(f'{kind}ImageH', 'OBJECTS'))
+			image = load_image(cfg.get_config_value(f'{kind}Image', 'OBJECTS'), width, height)
+			image2 = cfg.get_config_value(f'{kind}Image2', 'OBJECTS')
+			self.sprites.append((image, load_image(image2, width, height) if image2 else image))
+	# End: def Viewer._open
+
+	def _draw(self):
+		screen = self.screen
+		screen.blit(self.background, (0, 0))
+		sprites = self.sprites
+		blits = []
+		for kind, x, y in self.state.objects.values():
+			images = sprites[kind & ~KIND_DYING]
+			blits.append((images[1] if kind & KIND_DYING else images[0], (x, y)))
+		screen.blits(blits, False)
+		screen.blit(self.font.render(f'Score: {self.state.score}', True, CLR_WHITE), (10, 10))
+		if not self.headless:
+			pygame.display.update()
+	# End: def Viewer._draw
+# End: class Viewer
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Kamikaze Invaders spectator viewer')
+	parser.add_argument('--address', help='broadcast server address, host:port or unix:path')
+	parser.add_argument('--headless', action='store_true', help='render offscreen and print stream statistics')
+	parser.add_argument('--seconds', type=float, help='stop after this many seconds')
+	parser.add_argument('--save', help='save the last frame to this image file')
+	args = parser.parse_args()
+
+	if args.headless:
+		os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+	cfg.IniConfig('config/game.ini')
+	pygame.init()
+	viewer = Viewer(args.address or cfg.get_config_value_default('address', 'BROADCAST', '127.0.0.1:8765'), args.headless)
+	viewer.run(args.seconds, args.save)
+	pygame.quit()
@@ -1,2 +1,2 @@
 #!/bin/bash
-PYTHONPATH=$(dirname $0):${PYTHONPATH} python3 invaders/invaders.py
+PYTHONPATH=$(dirname $0):${PYTHONPATH} python3 invaders/invaders.py "$@"
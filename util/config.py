@@ -24,20 +24,33 @@ old_value = config.set_value('key', 'NewValue', 'section')
 
 # Save values to file, returing True on success or False on error...
 success = config.save()
+
+# Watch the file for edits, then call poll() once per frame to pick them up,
+# returning a map of (section, key) to (old value, new value)...
+config.watch(interval=0.5)
+changes = config.poll()
 """
 import configparser as ini
 import json
+import os
+import time
 
 
 class Config:
 	"""Base config class. Should not be used directly."""
 
-	def __init__(self, filename) -> None:
+	def __init__(self, filename, values=None) -> None:
 		"""
 		Initializes the instance by opening the file and loading it's values.
+		If a map of previously loaded values is given then it is used instead
+		of reading the file.
 		"""
 		self.filename = filename
-		self.config_map = self.load()
+		self.config_map = self.load(values)
+		self.watch_interval = None
+		self.next_check = 0.0
+		self.file_stamp = None
+		self.file_values = {}
 	# End: def Config.__init__
 
 	def get_value(self, key, section=''):
@@ -89,9 +102,80 @@ class Config:
 		pass
 	# End: def Config.save
 
-	def load(self):
+	def watch(self, interval=0.5):
+		"""
+		Starts watching the named file for changes. poll() checks the file's
+		modification time and size at most once every 'interval' seconds.
+		"""
+		self.watch_interval = interval
+		self.next_check = time.monotonic() + interval
+		self.file_stamp = self._file_stamp()
+		self.file_values = self._flatten(self.load())
+	# End: def Config.watch
+
+	def poll(self):
+		"""
+		Reloads the named file if it changed since it was last read and binds
+		every value that differs from the previous file contents. Values set
+		in memory for keys that didn't change in the file are kept, and keys
+		removed from the file keep their last value. Returns a map of
+		(section, key) to (old value, new value) for the changed keys, where
+		the old value is the one bound until now, which is empty if nothing
+		changed or the file isn't being watched.
+		"""
+		if self.watch_interval is None:
+			return {}
+		now = time.monotonic()
+		if now < self.next_check:
+			return {}
+		self.next_check = now + self.watch_interval
+
+		stamp = self._file_stamp()
+		if stamp == self.file_stamp:
+			return {}
+		self.file_stamp = stamp
+
+		try:
+			values = self._flatten(self.load())
+		except Exception as e:
+			print(f"Config file {self.filename} could not be reloaded: {e}")
+			return {}
+		if not values:
+			return {}
+
+		changes = {}
+		for (section, key), value in values.items():
+			old_value = self.file_values.get((section, key))
+			if value != old_value:
+				changes[(section, key)] = (self.set_value(key, value, section), value)
+		self.file_values.update(values)
+
+		return changes
+	# End: def Config.poll
+
+	def _file_stamp(self):
+		try:
+			stat = os.stat(self.filename)
+		except OSError:
+			return None
+		return stat.st_mtime_ns, stat.st_size
+	# End: def Config._file_stamp
+
+	def _flatten(self, config_map):
+		values = {}
+		for section, config in config_map.items():
+			if hasattr(config, 'items'):
+				for key, value in config.items():
+					values[(section, key)] = value
+			else:
+				values[('', section)] = config
+		return values
+	# End: def Config._flatten
+
+	def load(self, values=None):
 		"""
-		Loads the named configuration file from disk.
+		Loads the named configuration file from disk, or from the given map of
+		previously loaded values.
 		"""
 		pass
 	# End: def Config.load
@@ -101,10 +185,10 @@ class Config:
 class IniConfig(Config):
 	"""Config class for reading and writing files in .ini format."""
 
-	def __init__(self, filename) -> None:
+	def __init__(self, filename, values=None) -> None:
 		global config
 
-		super().__init__(filename)
+		super().__init__(filename, values)
 		config = self
 	# End: def IniConfig.__init__
 
@@ -117,9 +201,16 @@ class IniConfig(Config):
 			parser.write(f)
 	# End: def IniConfig.save
 
-	def load(self):
+	def load(self, values=None):
 		config = {}
 
+		if values is not None:
+			parser = ini.ConfigParser()
+			parser.read_dict(values)
+			for section in parser.sections():
+				config[section] = parser[section]
+			return config
+
 		try:
 			parser = ini.ConfigParser()
 			files = parser.read(self.filename)
@@ -147,4 +238,11 @@ def get_config_value_default(key, section, default=None):
 	return value
 # End: def get_config_value_default
 
+def get_config_flag(key, section, default=False):
+	value = get_config_value(key, section)
+	if value is None:
+		return default
+	return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+# End: def get_config_flag
+
 config = None